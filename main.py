@@ -1,89 +1,58 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 import os
-import configparser
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Only what the window needs is imported here; the renderer (ReportLab, NumPy, the font)
+# is loaded by warm_up on the render thread once the window is up.
+from src.paths import config_file_path, output_dir
+from src.preview import DialPreview
+from src.spec import DialSpec
+
+# Dials rendered during this session, so regenerating unchanged settings is instant.
+# Created by warm_up.
+render_cache = None
+
+# Dials are rendered one at a time off the Tk main thread
+render_executor = ThreadPoolExecutor(max_workers=1)
+render_job = None
+
+# Extra scale rings of the loaded configuration; the GUI has no fields for them and keeps them as they are
+rings = None
+
+
+def warm_up():
+    """
+    Import the renderer and register the fonts. Runs as the first job on the render thread,
+    so every render submitted later finds it loaded.
+    """
+    global render_cache
+    from src.cache import RenderCache
+    from src.dialgenerator import register_fonts
+
+    register_fonts()
+    render_cache = RenderCache()
 
-# Import functions from dialgenerator
-from src.dialgenerator import read_config, draw_thermometer_dial, config_file_path, output_dir
 
 def load_config():
-    """Load the current config.ini settings into a dictionary."""
+    """Load the current config.ini settings into a DialSpec."""
     if not os.path.exists(config_file_path):
         messagebox.showerror("Error", f"Configuration file '{config_file_path}' not found.")
         return None
 
-    config = configparser.ConfigParser()
-    config.read(config_file_path)
-
-    dial_settings = config['DialSettings']
-
-    settings = {
-        'filename': dial_settings.get('filename', 'thermometer_dial.pdf'),
-        'dial_radius_mm': dial_settings.getfloat('dial_radius_mm', 90),
-        'temperature_start': dial_settings.getfloat('temperature_start', 0),
-        'temperature_end': dial_settings.getfloat('temperature_end', 200),
-        'angle_start': dial_settings.getfloat('angle_start', 0),
-        'angle_end': dial_settings.getfloat('angle_end', 270),
-        'major_tick_division': dial_settings.getfloat('major_tick_division', 10),
-        'minor_tick_division': dial_settings.getint('minor_tick_division', 1),
-        'major_tick_length_mm': dial_settings.getfloat('major_tick_length_mm', 10),
-        'major_tick_width': dial_settings.getfloat('major_tick_width', 1),
-        'major_tick_inner_width': dial_settings.getfloat('major_tick_inner_width', 3),
-        'minor_tick_length_mm': dial_settings.getfloat('minor_tick_length_mm', 5),
-        'minor_tick_width': dial_settings.getfloat('minor_tick_width', 0.5),
-        'middle_minor_tick_length_mm': dial_settings.getfloat('middle_minor_tick_length_mm', 7),
-        'scale_text_radius_mm': dial_settings.getfloat('scale_text_radius_mm', 29),
-        'font_size': dial_settings.getint('font_size', 12),
-        'font_family': dial_settings.get('font_family', 'Helvetica')
-    }
+    try:
+        return DialSpec.from_ini(config_file_path)
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return None
 
-    # Load existing MajorTickPositions if any
-    major_positions = {}
-    if 'MajorTickPositions' in config:
-        for t, a in config['MajorTickPositions'].items():
-            # t: temperature (string), a: angle (string)
-            # Convert them to float if possible
-            try:
-                temp_val = float(t)
-                angle_val = float(a)
-                major_positions[temp_val] = angle_val
-            except ValueError:
-                # If invalid, skip
-                pass
-
-    return settings, major_positions
-
-
-def save_config(settings, major_positions):
-    """Save the updated settings and major positions to config.ini."""
-    config = configparser.ConfigParser()
-    config['DialSettings'] = {
-        'filename': settings['filename'],
-        'dial_radius_mm': str(settings['dial_radius_mm']),
-        'temperature_start': str(settings['temperature_start']),
-        'temperature_end': str(settings['temperature_end']),
-        'angle_start': str(settings['angle_start']),
-        'angle_end': str(settings['angle_end']),
-        'major_tick_division': str(settings['major_tick_division']),
-        'minor_tick_division': str(settings['minor_tick_division']),
-        'major_tick_length_mm': str(settings['major_tick_length_mm']),
-        'major_tick_width': str(settings['major_tick_width']),
-        'major_tick_inner_width': str(settings['major_tick_inner_width']),
-        'minor_tick_length_mm': str(settings['minor_tick_length_mm']),
-        'minor_tick_width': str(settings['minor_tick_width']),
-        'middle_minor_tick_length_mm': str(settings['middle_minor_tick_length_mm']),
-        'scale_text_radius_mm': str(settings['scale_text_radius_mm']),
-        'font_size': str(settings['font_size']),
-        'font_family': settings['font_family']
-    }
 
-    if major_positions:
-        config['MajorTickPositions'] = {}
-        for temp_val, angle_val in major_positions.items():
-            config['MajorTickPositions'][str(temp_val)] = str(angle_val)
+def save_config(spec):
+    """Save the updated settings and major positions to config.ini."""
+    spec.write_ini(config_file_path)
 
-    with open(config_file_path, 'w') as f:
-        config.write(f)
 
 def browse_output_pdf():
     """Open a 'Save As' dialog to select where to save the output PDF."""
@@ -96,31 +65,17 @@ def browse_output_pdf():
     if new_filename:
         entries['filename'].set(new_filename)  # Update the filename entry with the chosen path
 
-def generate_dial():
-    """Called when user clicks 'Generate Dial' button."""
-    updated_settings = {}
-    float_fields = ['dial_radius_mm', 'temperature_start', 'temperature_end',
-                    'angle_start', 'angle_end', 'major_tick_division', 'major_tick_length_mm',
-                    'major_tick_width', 'major_tick_inner_width', 'minor_tick_length_mm',
-                    'minor_tick_width', 'middle_minor_tick_length_mm', 'scale_text_radius_mm']
-    int_fields = ['minor_tick_division', 'font_size']
-
-    # Convert main settings
-    for field, var in entries.items():
-        val = var.get()
-        if field in float_fields:
-            try:
-                val = float(val)
-            except ValueError:
-                messagebox.showerror("Error", f"Invalid float value for {field}")
-                return
-        elif field in int_fields:
-            try:
-                val = int(val)
-            except ValueError:
-                messagebox.showerror("Error", f"Invalid integer value for {field}")
-                return
-        updated_settings[field] = val
+def collect_settings():
+    """
+    Read all GUI fields into a DialSpec.
+
+    Returns:
+        DialSpec: The dial described by the fields.
+
+    Raises:
+        ValueError: If a field holds an invalid value.
+    """
+    settings = {field: var.get().strip() for field, var in entries.items()}
 
     # Handle major tick positions
     major_positions = {}
@@ -132,54 +87,136 @@ def generate_dial():
             continue
         if not temp_str or not angle_str:
             # One is empty, one is not
-            messagebox.showerror("Error", f"Major tick position {i+1} is incomplete.")
-            return
+            raise ValueError(f"Major tick position {i+1} is incomplete.")
         try:
             t_val = float(temp_str)
             a_val = float(angle_str)
             major_positions[t_val] = a_val
         except ValueError:
-            messagebox.showerror("Error", f"Invalid float values for major tick position {i+1}.")
+            raise ValueError(f"Invalid float values for major tick position {i+1}.")
+
+    return DialSpec(major_tick_positions=major_positions, rings=rings, **settings)
+
+
+def render_settings(spec, chosen_filename, progress):
+    """
+    Render the dial collected from the GUI fields. Runs on the background render thread.
+
+    The spec is the one the job was started with, not config.ini read back: a later click
+    may be rewriting the file while this render runs.
+
+    Parameters:
+        spec (DialSpec): The dial to render.
+        chosen_filename (str): Output path picked in the GUI; without one the dial goes to the dials folder.
+        progress (callable): Progress callback for draw_thermometer_dial.
+
+    Returns:
+        str: The filename the dial was saved as.
+    """
+    from src.cache import render_cached
+
+    filename = chosen_filename
+    if not filename:
+        os.makedirs(output_dir, exist_ok=True)
+        filename = os.path.join(output_dir, spec.filename)
+
+    render_cached(render_cache, spec, filename, progress=progress)
+    return filename
+
+
+def generate_dial():
+    """Called when user clicks 'Generate Dial' button."""
+    global render_job
+    try:
+        spec = collect_settings()
+    except ValueError as e:
+        messagebox.showerror("Error", str(e))
+        return
+
+    request_key = spec
+    if render_job is not None:
+        if render_job['key'] == request_key and not render_job['cancel'].is_set():
+            # The same dial is already being rendered
             return
+        render_job['cancel'].set()
 
     # Save config
-    save_config(updated_settings, major_positions)
+    save_config(spec)
+
+    # Render on the background thread; progress comes back through a queue polled with root.after
+    cancel = threading.Event()
+    updates = queue.Queue()
+
+    def progress(phase, fraction):
+        if cancel.is_set():
+            from src.dialgenerator import RenderCancelled
+            raise RenderCancelled()
+        updates.put((phase, fraction))
+
+    render_job = {
+        'key': request_key,
+        'cancel': cancel,
+        'updates': updates,
+    }
+    render_job['future'] = render_executor.submit(render_settings, spec, entries['filename'].get().strip(), progress)
+    cancel_btn.config(state=tk.NORMAL)
+    status_var.set("Rendering...")
+    root.after(50, poll_render, render_job)
+
+
+def cancel_render():
+    """Called when user clicks 'Cancel' while a dial is rendering."""
+    if render_job is not None:
+        render_job['cancel'].set()
+        status_var.set("Cancelling...")
+
+
+def poll_render(job):
+    """Forward progress of a background render to the UI and report the result when it is done."""
+    global render_job
+    while not job['updates'].empty():
+        phase, fraction = job['updates'].get_nowait()
+        if job is render_job:
+            progress_var.set(fraction * 100)
+            status_var.set(f"Rendering: {phase}")
+
+    future = job['future']
+    if not future.done():
+        root.after(50, poll_render, job)
+        return
+
+    if job is not render_job:
+        # Superseded by a newer request, which reports its own result
+        return
+    render_job = None
+    cancel_btn.config(state=tk.DISABLED)
+    progress_var.set(0)
+
+    # The render thread has imported the renderer by now
+    from src.dialgenerator import RenderCancelled
 
-    # Now read config and generate the dial
     try:
-        (filename, dial_radius_mm, temperature_start, temperature_end, angle_start, angle_end,
-         scale_division, minor_tick_division, read_positions,
-         major_tick_length_mm, major_tick_width, minor_tick_length_mm,
-         minor_tick_width_, middle_minor_tick_length_mm, scale_text_radius_mm,
-         font_size, font_family, major_tick_inner_width) = read_config(config_file_path)
-
-        # filename is already potentially overridden in entries['filename']
-        # If user picked a custom path, it overrides config.ini setting
-        chosen_filename = entries['filename'].get().strip()
-        if chosen_filename:
-            filename = chosen_filename
-
-        draw_thermometer_dial(filename, dial_radius_mm, temperature_start, temperature_end,
-                              angle_start, angle_end, scale_division, minor_tick_division,
-                              read_positions, major_tick_length_mm, major_tick_width,
-                              minor_tick_length_mm, minor_tick_width_,
-                              middle_minor_tick_length_mm, scale_text_radius_mm,
-                              font_size, font_family, major_tick_inner_width)
-
-        messagebox.showinfo("Success", f"Dial generated and saved as {filename}")
+        filename = future.result()
+    except RenderCancelled:
+        status_var.set("Cancelled")
+        return
     except Exception as e:
+        status_var.set("")
         messagebox.showerror("Error", str(e))
+        return
+    status_var.set(f"Saved {filename}")
+    messagebox.showinfo("Success", f"Dial generated and saved as {filename}")
 
 
 def main():
-    global entries, major_tick_temp_vars, major_tick_angle_vars
+    global entries, major_tick_temp_vars, major_tick_angle_vars, root, progress_var, status_var, cancel_btn, rings
     root = tk.Tk()
     root.title("Dial Generator")
 
-    result = load_config()
-    if result is None:
+    spec = load_config()
+    if spec is None:
         return
-    settings, loaded_positions = result
+    rings = spec.rings
 
     fields = [
         ('filename', 'Filename'),
@@ -198,10 +235,14 @@ def main():
         ('middle_minor_tick_length_mm', 'Middle Minor Tick Length (mm)'),
         ('scale_text_radius_mm', 'Scale Text Radius (mm)'),
         ('font_size', 'Font Size'),
-        ('font_family', 'Font Family')
+        ('font_family', 'Font Family'),
+        ('label_step', 'Label Every Nth Major Tick'),
+        ('interpolation', 'Interpolation (linear/pchip)'),
+        ('calibration_file', 'Calibration CSV')
     ]
 
     entries = {}
+    preview = DialPreview(root, collect_settings)
 
     # Create main setting fields
     for i, (field, label_text) in enumerate(fields):
@@ -209,7 +250,8 @@ def main():
         lbl.grid(row=i, column=0, sticky=tk.W, padx=5, pady=5)
 
         var = tk.StringVar()
-        var.set(str(settings[field]))
+        var.set(str(getattr(spec, field)))
+        var.trace_add('write', preview.schedule)
         ent = tk.Entry(root, textvariable=var, width=30)
         ent.grid(row=i, column=1, padx=5, pady=5)
         entries[field] = var
@@ -226,7 +268,8 @@ def main():
 
     major_tick_temp_vars = []
     major_tick_angle_vars = []
-    loaded_items = list(loaded_positions.items())
+    # Positions from a calibration CSV stay in the file; the rows below are ignored while it is set
+    loaded_items = list(spec.major_tick_positions or ()) if not spec.calibration_file else []
     for i in range(10):
         temp_lbl = tk.Label(root, text=f"Pos {i+1} Temp:")
         temp_lbl.grid(row=start_row+1+i, column=0, sticky=tk.E, padx=5, pady=2)
@@ -248,13 +291,34 @@ def main():
         angle_entry = tk.Entry(root, textvariable=angle_var, width=10)
         angle_entry.grid(row=start_row+1+i, column=3, sticky=tk.W, padx=5, pady=2)
 
+        temp_var.trace_add('write', preview.schedule)
+        angle_var.trace_add('write', preview.schedule)
         major_tick_temp_vars.append(temp_var)
         major_tick_angle_vars.append(angle_var)
 
     generate_btn = tk.Button(root, text="Generate Dial", command=generate_dial)
-    generate_btn.grid(row=start_row+11, column=0, columnspan=4, pady=20)
+    generate_btn.grid(row=start_row+11, column=0, columnspan=2, pady=20)
+
+    cancel_btn = tk.Button(root, text="Cancel", command=cancel_render, state=tk.DISABLED)
+    cancel_btn.grid(row=start_row+11, column=2, columnspan=2, pady=20)
+
+    progress_var = tk.DoubleVar()
+    progress_bar = ttk.Progressbar(root, variable=progress_var, maximum=100)
+    progress_bar.grid(row=start_row+12, column=0, columnspan=4, sticky=tk.EW, padx=5)
+
+    status_var = tk.StringVar()
+    status_lbl = tk.Label(root, textvariable=status_var)
+    status_lbl.grid(row=start_row+13, column=0, columnspan=4, sticky=tk.W, padx=5, pady=(0, 5))
+
+    # Live preview to the right of all fields
+    preview.canvas.grid(row=0, column=4, rowspan=start_row+14, padx=10, pady=10, sticky=tk.N)
+
+    # Show the window first, then load the renderer in the background and draw the preview
+    render_executor.submit(warm_up)
+    root.after_idle(preview.refresh)
 
     root.mainloop()
+    render_executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
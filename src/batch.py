@@ -0,0 +1,326 @@
+"""
+Headless batch rendering of many dials from a manifest file.
+
+A manifest holds one dial spec per row, using the same keys as the [DialSettings]
+section of config.ini plus an optional 'major_tick_positions' entry; other keys are
+ignored. Supported formats:
+
+    .json   a list of objects (or {"dials": [...]})
+    .jsonl  one object per line, or columnar: a first line with the list of setting
+            names and then one list of values per line, which saves repeating the keys
+    .csv    one row per dial, header row with the setting names;
+            major_tick_positions written as "temp:angle;temp:angle;..."
+
+.jsonl and .csv manifests are streamed: rows are read only as fast as the workers
+render them, so a queue of any length runs in bounded memory (apart from the list of
+failed rows kept for the summary). Identical dials (same settings, different filename)
+are rendered once and copied to the other filenames, as long as the first one is among
+the last DEDUPE_WINDOW distinct dials.
+
+Usage:
+    python -m src.batch manifest.jsonl --workers 8 --output-dir dials
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .cache import DEFAULT_MAX_BYTES, RenderCache, render_cached
+from .dialgenerator import draw_thermometer_dial, register_fonts, output_dir
+from .spec import DialSpec
+
+# Per-worker render cache, opened by the pool initializer when --cache-dir is given
+_cache = None
+
+# Renders submitted per worker before reading further rows
+QUEUE_PER_WORKER = 4
+
+# Distinct dials remembered for de-duplication; an identical dial seen longer ago is rendered again
+DEDUPE_WINDOW = 10000
+
+
+def job_from_row(row, index):
+    """
+    Convert one manifest row into a DialSpec.
+
+    Parameters:
+        row (dict): Setting name -> value, as read from the manifest.
+        index (int): Row number, used for the default filename.
+
+    Returns:
+        DialSpec: The validated dial.
+
+    Raises:
+        ValueError: If the row is not a mapping of setting names or holds an invalid value.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"Expected an object of setting names, got {type(row).__name__}")
+    if None in row:
+        raise ValueError("Row has more cells than the header has columns")
+    if not all(isinstance(key, str) for key in row):
+        raise ValueError("Setting names must be strings")
+    if not row.get('filename'):
+        row = dict(row, filename=f"dial_{index:05d}.pdf")
+    # Manifests may carry bookkeeping columns of their own (order number, customer, ...)
+    return DialSpec.from_dict(row, strict=False)
+
+
+def iter_manifest(manifest_path):
+    """
+    Yield the rows of a manifest file one at a time.
+
+    .csv and .jsonl manifests are read lazily, so arbitrarily long files can be processed
+    in constant memory; a .json manifest is parsed as a whole. A .jsonl manifest whose
+    first line is a list of setting names is columnar: every further line is a list of
+    values in that order.
+
+    Parameters:
+        manifest_path (str): Path to a .json, .jsonl or .csv manifest.
+
+    Yields:
+        dict: One dict per dial.
+    """
+    ext = os.path.splitext(manifest_path)[1].lower()
+    if ext not in ('.csv', '.jsonl', '.json'):
+        raise ValueError(f"Unsupported manifest format '{ext}' (expected .json, .jsonl or .csv)")
+    with open(manifest_path, newline='', encoding='utf-8') as f:
+        if ext == '.csv':
+            yield from csv.DictReader(f)
+        elif ext == '.jsonl':
+            columns = None
+            first = True
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{manifest_path}, line {line_number}: {e}")
+                if first and isinstance(row, list) and all(isinstance(name, str) for name in row):
+                    columns = row  # header of a columnar manifest
+                elif columns is not None and isinstance(row, list):
+                    # Like csv.DictReader: surplus values go under the key None, missing ones are left out
+                    values = dict(zip(columns, row))
+                    if len(row) > len(columns):
+                        values[None] = row[len(columns):]
+                    yield values
+                else:
+                    yield row
+                first = False
+        else:
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get('dials', [])
+            yield from data
+
+
+def read_manifest(manifest_path):
+    """
+    Read all rows of a manifest file.
+
+    Parameters:
+        manifest_path (str): Path to a .json, .jsonl or .csv manifest.
+
+    Returns:
+        list: One dict per dial.
+    """
+    return list(iter_manifest(manifest_path))
+
+
+def init_worker(cache_dir=None, cache_size=DEFAULT_MAX_BYTES):
+    """Pool initializer: register the font once and open the shared render cache."""
+    global _cache
+    register_fonts()
+    if cache_dir is not None:
+        _cache = RenderCache(cache_size, cache_dir)
+
+
+def render_job(index, spec, target_dir, invariant=None):
+    """
+    Render a single dial. Runs inside a worker process.
+
+    Returns:
+        tuple: (index, output path, elapsed seconds, error message or None, cache hit)
+    """
+    start = time.perf_counter()
+    filename = os.path.join(target_dir, spec.filename)
+    hit = False
+    try:
+        if _cache is not None:
+            hit = render_cached(_cache, spec, filename, invariant=invariant)
+        else:
+            draw_thermometer_dial(spec, filename, invariant=invariant)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return index, filename, time.perf_counter() - start, error, hit
+
+
+def _copy_duplicate(source, filename):
+    """Write the PDF of an identical dial under another filename; returns an error message or None."""
+    if os.path.abspath(source) == os.path.abspath(filename):
+        return None
+    try:
+        shutil.copyfile(source, filename)
+    except OSError as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+
+def run_batch(rows, target_dir=output_dir, workers=None, cache_dir=None, cache_size=DEFAULT_MAX_BYTES,
+              invariant=None, max_pending=None):
+    """
+    Render every row of a manifest across a process pool.
+
+    Rows are consumed as the workers keep up: at most max_pending renders are queued,
+    and no further row is read until one of them finishes. A dial identical to one of
+    the last DEDUPE_WINDOW distinct dials of the run (same render_key) is not rendered
+    again but copied from the first one's PDF. A malformed row only fails itself; if the
+    manifest cannot be read any further, the rows read so far are still rendered.
+
+    Parameters:
+        rows (iterable): Manifest rows as yielded by iter_manifest.
+        target_dir (str): Directory the dials are written to.
+        workers (int or None): Number of worker processes (default: CPU count).
+        cache_dir (str or None): Directory of a persistent render cache shared by all workers.
+        cache_size (int): Size bound of the render cache in bytes.
+        invariant (bool or None): Write reproducible PDFs, see draw_thermometer_dial.
+        max_pending (int or None): Renders queued at once (default: QUEUE_PER_WORKER per worker).
+
+    Returns:
+        dict: Summary with 'total', 'ok', 'failed', 'errors' [(index, output path, message)],
+            'cache_hits', 'duplicates' (dials copied instead of rendered), 'read_error' (why the
+            manifest could not be read to the end, or None) and 'elapsed'.
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or QUEUE_PER_WORKER * workers
+    errors = []
+    total = 0
+    cache_hits = 0
+    duplicates = 0
+    read_error = None
+    pending = {}  # future -> render key digest of the dial
+    finished = OrderedDict()  # render key digest -> (output path, error or None) of recent first renders
+    waiting = {}  # render key digest -> [(index, output path)] of duplicates whose first render still runs
+
+    def complete(done):
+        nonlocal cache_hits
+        for future in done:
+            key = pending.pop(future)
+            index, filename, _, error, hit = future.result()
+            if error is not None:
+                errors.append((index, filename, error))
+            cache_hits += hit
+            finished[key] = (filename, error)
+            if len(finished) > DEDUPE_WINDOW:
+                finished.popitem(last=False)
+            for duplicate_index, duplicate in waiting.pop(key):
+                duplicate_error = error or _copy_duplicate(filename, duplicate)
+                if duplicate_error is not None:
+                    errors.append((duplicate_index, duplicate, duplicate_error))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_dir, cache_size)) as pool:
+        rows = iter(rows)
+        for index in itertools.count():
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+            except (OSError, ValueError) as e:
+                read_error = str(e)
+                break
+            total += 1
+            try:
+                spec = job_from_row(row, index)
+            except (ValueError, TypeError, AttributeError) as e:
+                filename = row.get('filename') if isinstance(row, dict) else None
+                # Reported under the path the row would have been written to, like every other failure
+                filename = os.path.join(target_dir, str(filename or f"dial_{index:05d}.pdf"))
+                errors.append((index, filename, str(e)))
+                continue
+
+            # A digest keeps the de-duplication maps small whatever the size of the spec
+            key = hashlib.sha256(repr(spec.render_key()).encode('utf-8')).digest()
+            if key in finished or key in waiting:
+                duplicates += 1
+                filename = os.path.join(target_dir, spec.filename)
+                if key in waiting:
+                    waiting[key].append((index, filename))
+                else:
+                    finished.move_to_end(key)
+                    source, error = finished[key]
+                    error = error or _copy_duplicate(source, filename)
+                    if error is not None:
+                        errors.append((index, filename, error))
+                continue
+
+            # Back-pressure: stop reading rows until the queue has room again
+            while len(pending) >= max_pending:
+                complete(wait(pending, return_when=FIRST_COMPLETED).done)
+            pending[pool.submit(render_job, index, spec, target_dir, invariant)] = key
+            waiting[key] = []
+
+        while pending:
+            complete(wait(pending, return_when=FIRST_COMPLETED).done)
+
+    errors.sort()
+    return {
+        'total': total,
+        'ok': total - len(errors),
+        'failed': len(errors),
+        'errors': errors,
+        'cache_hits': cache_hits,
+        'duplicates': duplicates,
+        'read_error': read_error,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render many dials from a manifest file.")
+    parser.add_argument('manifest', help="Manifest file (.json, .jsonl or .csv)")
+    parser.add_argument('-o', '--output-dir', default=output_dir, help="Output directory for the PDFs")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--cache-dir', default=None, help="Reuse PDFs rendered by earlier runs from this directory")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                        help="Render cache size limit in MB")
+    parser.add_argument('--reproducible', action='store_true',
+                        help="Write byte-identical PDFs for identical dials (fixed date and document ID)")
+    parser.add_argument('--queue', type=int, default=None,
+                        help=f"Renders queued ahead of the workers (default: {QUEUE_PER_WORKER} per worker)")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(iter_manifest(args.manifest), args.output_dir, args.workers, args.cache_dir,
+                        int(args.cache_size * 2**20), args.reproducible or None, args.queue)
+    if summary['read_error'] is not None:
+        print(f"Could not read manifest '{args.manifest}': {summary['read_error']}", file=sys.stderr)
+        if not summary['total']:
+            return 2
+
+    for index, filename, message in summary['errors']:
+        print(f"FAILED row {index} ({filename}): {message}", file=sys.stderr)
+
+    elapsed = summary['elapsed']
+    rate = summary['ok'] / elapsed if elapsed > 0 else 0.0
+    print(f"Rendered {summary['ok']}/{summary['total']} dials in {elapsed:.2f}s "
+          f"({rate:.1f} dials/s), {summary['failed']} failed")
+    if summary['duplicates']:
+        print(f"Identical dials: {summary['duplicates']} copied instead of rendered")
+    if args.cache_dir is not None:
+        rendered = summary['ok'] - summary['cache_hits'] - summary['duplicates']
+        print(f"Render cache: {summary['cache_hits']} hits, {max(0, rendered)} rendered")
+    return 1 if summary['failed'] or summary['read_error'] is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
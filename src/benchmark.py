@@ -0,0 +1,207 @@
+"""
+Offline benchmark suite for dial generation.
+
+Every case renders one or more dials in-process and records the time spent in each
+phase of the pipeline as reported by RenderMetrics (config parsing, tick positions,
+angle interpolation, minor ticks, major ticks, labels, serialization), the peak traced memory and the PDF size. Results are compared against a
+baseline stored in benchmarks/baseline.json; the run fails if a case got slower, larger
+or more memory hungry than the tolerance allows.
+
+Usage:
+    python -m src.benchmark                     compare against the baseline
+    python -m src.benchmark --update-baseline   record a new baseline on this machine
+    python -m src.benchmark --case fine         only run cases whose name contains 'fine'
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from .dialgenerator import read_config, register_fonts, render_to_bytes
+from .instrumentation import RenderMetrics
+from .paths import parent_dir
+from .spec import DialSpec
+
+baseline_path = os.path.join(parent_dir, 'benchmarks', 'baseline.json')
+
+PHASES = ('read_config', 'tick_positions', 'interpolate_angles', 'minor_ticks', 'major_ticks', 'labels', 'serialize')
+
+# Differences below these are noise, whatever the relative change
+MIN_TIME_DELTA = 0.002  # seconds
+MIN_MEMORY_DELTA = 256 * 1024  # bytes
+
+BASE_SETTINGS = {
+    'filename': 'benchmark.pdf',
+    'dial_radius_mm': 50.0,
+    'temperature_start': 0.0,
+    'temperature_end': 200.0,
+    'major_tick_division': 10.0,
+    'major_tick_length_mm': 7.2,
+    'major_tick_width': 1.68,
+    'major_tick_inner_width': 5.04,
+    'minor_tick_length_mm': 3.5,
+    'minor_tick_width': 0.3,
+    'middle_minor_tick_length_mm': 5.4,
+    'scale_text_radius_mm': 37.0,
+    'font_size': 10,
+    'font_family': 'din1451ef',
+}
+
+STEPS = {'coarse': 1.0, 'fine': 0.01}
+
+
+def major_positions(count):
+    """count calibration points spread over the 0-200 scale and 270 degrees, slightly non-linear."""
+    return [(200.0 * i / (count - 1), 270.0 * (i / (count - 1)) ** 0.95) for i in range(count)]
+
+
+def benchmark_cases():
+    """
+    All benchmark cases: coarse vs. 0.01-step scale, 9 vs. 500 major positions, 1 vs. 1000 dials.
+
+    The 1000-dial runs use the coarse scale only; a thousand fine scales would take minutes
+    without telling us more than the single fine dial does.
+
+    Returns:
+        dict: Case name -> (DialSpec, number of dials, repeats).
+    """
+    cases = {}
+    for step_name, step in STEPS.items():
+        for positions in (9, 500):
+            for dials in (1, 1000):
+                if step_name == 'fine' and dials > 1:
+                    continue
+                spec = DialSpec(minor_tick_division=step, major_tick_positions=major_positions(positions),
+                                **BASE_SETTINGS)
+                name = f"{step_name}-{positions}pos-x{dials}"
+                cases[name] = (spec, dials, 7 if dials == 1 else 1)
+    return cases
+
+
+def run_once(spec, ini_path, dials):
+    """
+    Parse and render a dial 'dials' times.
+
+    Returns:
+        tuple: ({phase: seconds}, PDF size in bytes)
+    """
+    timings = dict.fromkeys(PHASES, 0.0)
+    size = 0
+
+    for _ in range(dials):
+        metrics = RenderMetrics()
+        read_config(ini_path, metrics)
+        size = len(render_to_bytes(spec, metrics=metrics))
+        for phase in PHASES:
+            timings[phase] += metrics.seconds(phase)
+
+    return timings, size
+
+
+def run_case(spec, dials, repeats):
+    """
+    Benchmark one case.
+
+    Returns:
+        dict: Per-phase seconds (best of repeats), 'total', 'peak_memory' and 'pdf_bytes'.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        ini_path = os.path.join(tmp, 'config.ini')
+        spec.write_ini(ini_path)
+
+        # Warm-up render, so one-off costs (font subsetting tables, imports) are not counted
+        run_once(spec, ini_path, 1)
+
+        best = dict.fromkeys(PHASES, float('inf'))
+        for _ in range(repeats):
+            timings, size = run_once(spec, ini_path, dials)
+            for phase in PHASES:
+                best[phase] = min(best[phase], timings[phase])
+
+        # Memory is measured on a separate single-dial run, tracing slows everything down
+        tracemalloc.start()
+        run_once(spec, ini_path, 1)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    result = dict(best)
+    result['total'] = sum(best.values())
+    result['peak_memory'] = peak
+    result['pdf_bytes'] = size
+    return result
+
+
+def compare(name, result, baseline, tolerance):
+    """
+    Compare a case against its baseline.
+
+    Returns:
+        list: Human readable regressions, empty if the case is within tolerance.
+    """
+    regressions = []
+    for key in PHASES + ('total',):
+        old, new = baseline.get(key), result[key]
+        if old is not None and new > old * (1 + tolerance) and new - old > MIN_TIME_DELTA:
+            regressions.append(f"{name}: {key} {old * 1000:.1f} ms -> {new * 1000:.1f} ms")
+    old, new = baseline.get('peak_memory'), result['peak_memory']
+    if old is not None and new > old * (1 + tolerance) and new - old > MIN_MEMORY_DELTA:
+        regressions.append(f"{name}: peak memory {old / 1024:.0f} KB -> {new / 1024:.0f} KB")
+    old, new = baseline.get('pdf_bytes'), result['pdf_bytes']
+    if old is not None and new > old * 1.01:
+        regressions.append(f"{name}: PDF size {old} -> {new} bytes")
+    return regressions
+
+
+def print_result(name, result):
+    phases = '  '.join(f"{phase} {result[phase] * 1000:7.1f}" for phase in PHASES)
+    print(f"{name:22} total {result['total'] * 1000:8.1f} ms | {phases} | "
+          f"peak {result['peak_memory'] / 1024:7.0f} KB | {result['pdf_bytes']:8d} B")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dial generation against a stored baseline.")
+    parser.add_argument('--case', default='', help="Only run cases whose name contains this text")
+    parser.add_argument('--baseline', default=baseline_path, help="Baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed relative slowdown / memory growth before a case fails")
+    args = parser.parse_args(argv)
+
+    register_fonts()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name, (spec, dials, repeats) in benchmark_cases().items():
+        if args.case not in name:
+            continue
+        results[name] = run_case(spec, dials, repeats)
+        print_result(name, results[name])
+        if name in baseline:
+            regressions.extend(compare(name, results[name], baseline[name], args.tolerance))
+
+    if args.update_baseline:
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    print(f"{len(results)} cases, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
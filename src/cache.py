@@ -0,0 +1,284 @@
+"""
+Content-addressed cache for rendered dial PDFs.
+
+The cache key is a SHA-256 over a canonical JSON form of every setting that affects
+the drawing (including the resolved major tick positions), the bytes of the bundled
+font and the library / ReportLab versions. The output filename is not part of the key,
+so the same dial face saved under different names is rendered once.
+
+Entries live either in memory or, when a directory is given, as <key>.pdf files so the
+cache survives between CLI runs and can be shared by several processes. Both are bounded
+by total size with LRU eviction.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from reportlab import Version as reportlab_version
+
+from . import __version__
+from .dialgenerator import render_to_bytes, resolve_major_tick_positions
+from .fonts import font_digest
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Lock file in a cache directory, held while entries are added or evicted. It also holds
+# the total size of the entries, so a put does not have to scan the directory.
+LOCK_FILE = '.lock'
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path, shared between processes. Yields the open file."""
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def dial_cache_key(spec, batch_paths=True, invariant=None):
+    """
+    Canonical hash of a dial.
+
+    Parameters:
+        spec (DialSpec): The dial; its filename is ignored.
+        batch_paths (bool): Drawing mode passed to draw_thermometer_dial.
+        invariant (bool or None): Reproducible output mode passed to draw_thermometer_dial.
+
+    Returns:
+        str: Hex digest identifying the rendered PDF.
+    """
+    data = spec.to_dict()
+    del data['filename']
+    del data['calibration_file']  # only its contents matter, and they are in major_tick_positions
+    data['major_tick_positions'] = sorted(resolve_major_tick_positions(spec).items())
+    data['batch_paths'] = bool(batch_paths)
+    if invariant:
+        # Only added when set, so the keys of ordinary renders stay valid
+        data['invariant'] = True
+    data['font_sha256'] = font_digest()
+    data['version'] = __version__
+    data['reportlab'] = reportlab_version
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """
+    Size-bounded LRU cache of rendered PDF bytes.
+
+    A directory may be shared by several processes (e.g. the batch workers), so the bound holds
+    for the directory as a whole: the running total size is kept in the lock file and updated by
+    every put under the lock. The directory is only scanned when the cache is opened and when the
+    total crosses max_bytes, to evict the least recently used files.
+
+    Parameters:
+        max_bytes (int): Upper bound for the total size of all cached PDFs.
+        directory (str or None): Store entries as files in this directory instead of in memory.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._sizes = OrderedDict()  # key -> size, least recently used first (memory mode only)
+        self._data = {}  # key -> bytes (memory mode only)
+        self._total = 0
+        self._lock = threading.Lock()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            # Files may have been added or removed since the recorded total was written
+            with self._lock, self._directory_lock() as f:
+                self._evict_files(f)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pdf')
+
+    def _directory_lock(self):
+        return _file_lock(os.path.join(self.directory, LOCK_FILE))
+
+    @staticmethod
+    def _read_total(f):
+        f.seek(0)
+        text = f.read().strip()
+        return int(text) if text.isdigit() else None
+
+    @staticmethod
+    def _write_total(f, total):
+        f.seek(0)
+        f.truncate()
+        f.write(str(total).encode('ascii'))
+        f.flush()
+
+    def _entries(self):
+        """(mtime, key, size) of every file in the cache directory, least recently used first."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # evicted by another process meanwhile
+                entries.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        return sorted(entries)
+
+    def get(self, key):
+        """Return the cached PDF bytes for key, or None on a miss."""
+        with self._lock:
+            if self.directory is None:
+                if key not in self._sizes:
+                    self.misses += 1
+                    return None
+                data = self._data[key]
+                self._sizes.move_to_end(key)
+            else:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        data = f.read()
+                    os.utime(self._path(key))
+                except OSError:
+                    # Not cached, or evicted by another process sharing the directory
+                    self.misses += 1
+                    return None
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store PDF bytes under key, evicting least recently used entries as needed."""
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if self.directory is None:
+                if key in self._sizes:
+                    self._total -= self._sizes.pop(key)
+                self._data[key] = data
+                self._sizes[key] = size
+                self._total += size
+                while self._total > self.max_bytes and self._sizes:
+                    key, size = self._sizes.popitem(last=False)
+                    self._total -= size
+                    self.evictions += 1
+                    del self._data[key]
+                return
+
+            tmp_path = self._path(key) + f'.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            # Other processes put into the same directory; one at a time updates the total
+            with self._directory_lock() as f:
+                total = self._read_total(f)
+                try:
+                    replaced = os.path.getsize(self._path(key))
+                except OSError:
+                    replaced = 0
+                os.replace(tmp_path, self._path(key))
+                if total is None or total - replaced + size > self.max_bytes:
+                    self._evict_files(f)
+                else:
+                    self._write_total(f, total - replaced + size)
+
+    def _evict_files(self, f):
+        """Scan the directory, remove least recently used files down to max_bytes and record the total."""
+        entries = self._entries()
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+        self._write_total(f, total)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            if self.directory is not None:
+                with self._directory_lock() as f:
+                    for _, key, _ in self._entries():
+                        try:
+                            os.remove(self._path(key))
+                        except FileNotFoundError:
+                            pass
+                    self._write_total(f, 0)
+            self._sizes.clear()
+            self._data.clear()
+            self._total = 0
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            if self.directory is not None:
+                entries = self._entries()
+                count, total = len(entries), sum(size for _, _, size in entries)
+            else:
+                count, total = len(self._sizes), self._total
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': count,
+                'bytes': total,
+                'max_bytes': self.max_bytes,
+            }
+
+
+def render_cached(cache, spec, filename=None, batch_paths=True, progress=None, invariant=None):
+    """
+    Write a dial to a file, reusing a cached PDF when the same dial was rendered before.
+
+    Parameters:
+        cache (RenderCache): Cache to look up and fill.
+        spec (DialSpec): The dial to render.
+        filename (str or None): Output PDF filename (default: spec.filename).
+        batch_paths (bool): Drawing mode passed to draw_thermometer_dial.
+        progress (callable or None): Progress callback passed on to draw_thermometer_dial.
+        invariant (bool or None): Reproducible output mode passed on to draw_thermometer_dial.
+
+    Returns:
+        bool: True on a cache hit, False if the dial had to be rendered. Nothing is printed;
+            reporting the result is up to the caller.
+    """
+    if filename is None:
+        filename = spec.filename
+    key = dial_cache_key(spec, batch_paths, invariant)
+    data = cache.get(key)
+    if data is not None:
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return True
+
+    data = render_to_bytes(spec, batch_paths, progress, invariant=invariant)
+    with open(filename, 'wb') as f:
+        f.write(data)
+    cache.put(key, data)
+    return False
@@ -1,127 +1,192 @@
-import configparser
-from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont 
-import math
+import io
+import numpy as np
 import os
-import sys
 
-script_dir = os.path.dirname(os.path.abspath(__file__))  # directory of dial-generator.py
-parent_dir = os.path.dirname(script_dir)  # parent directory of src
-output_dir = os.path.join(parent_dir, 'dials') #output dir for dials
+from .geometry import (MAJOR, MIDDLE_MINOR, MINOR, RingScale, TickScale, TickTable, compute_tick_table,
+                       even_major_tick_positions)
+from .fonts import BUNDLED_FONTS, ensure_font, label_width
+from .instrumentation import NULL_METRICS, RenderMetrics, json_log_hook
+from .paths import config_file_path, output_dir
+from .spec import DialSpec
 
-if getattr(sys, 'frozen', False):
-    # Running inside a PyInstaller bundle
-    base_path = sys._MEIPASS
-else:
-    # Running normally (not frozen)
-    base_path = os.path.dirname(os.path.abspath(__file__))
+# ReportLab's canvas is imported on first render; it is the slowest import of the package.
 
-font_path = os.path.join(base_path, 'font', 'din1451ef.ttf')
 
-os.makedirs(output_dir, exist_ok=True)
+class RenderCancelled(Exception):
+    """Raised from a progress callback to abort a running render."""
 
-pdfmetrics.registerFont(TTFont('din1451ef', font_path))
 
-config_file_path = os.path.join(parent_dir, 'config.ini')
+def _no_progress(phase, fraction):
+    pass
 
-def read_config(config_file_path):
+
+def register_fonts():
+    """
+    Register the bundled fonts with ReportLab now instead of on first use. Worker
+    processes call this from their initializer so the first render does not pay for it.
     """
-    Read configuration values from a given INI file and return them as parameters.
+    for font_family in BUNDLED_FONTS:
+        ensure_font(font_family)
+
+
+# The physical_start_angle shifts the entire scale. If 135 degrees is chosen,
+# it might mean that the "0" angle visually appears at top-left quadrant.
+# Adjust this angle as needed to orient your scale correctly.
+physical_start_angle = 135  # degrees
+
+# Scales with at least this many ticks are drawn in streaming mode, STREAM_CHUNK_TICKS at a time
+STREAM_MIN_TICKS = 250000
+STREAM_CHUNK_TICKS = 65536
+
+
+def read_config(config_file_path, metrics=None):
+    """
+    Read configuration values from a given INI file.
 
     Parameters:
-        config_file (str): Path to the configuration file.
+        config_file_path (str): Path to the configuration file.
+        metrics (RenderMetrics or None): Records the time spent parsing as phase 'read_config'.
 
     Returns:
-        tuple: A tuple containing all necessary configuration parameters for drawing the dial.
-    """
-
-    config = configparser.ConfigParser()
-    config.read(config_file_path)
-
-    dial_settings = config['DialSettings']
-    filename = os.path.join(output_dir, dial_settings.get('filename', 'thermometer_dial.pdf'))
-    dial_radius_mm = dial_settings.getfloat('dial_radius_mm', 90)
-    temperature_start = dial_settings.getfloat('temperature_start', 0)
-    temperature_end = dial_settings.getfloat('temperature_end', 200)
-    angle_start = dial_settings.getfloat('angle_start', 0)
-    angle_end = dial_settings.getfloat('angle_end', 270)
-    scale_division = dial_settings.getfloat('major_tick_division', 10)
-    minor_tick_division = dial_settings.getint('minor_tick_division', 1)
-
-    major_tick_length_mm = dial_settings.getfloat('major_tick_length_mm', 10)
-    major_tick_width = dial_settings.getfloat('major_tick_width', 1)
-    major_tick_inner_width = dial_settings.getfloat('major_tick_inner_width', 3)
-    minor_tick_length_mm = dial_settings.getfloat('minor_tick_length_mm', 5)
-    minor_tick_width = dial_settings.getfloat('minor_tick_width', 0.5)
-    middle_minor_tick_length_mm = dial_settings.getfloat('middle_minor_tick_length_mm', 7)
-    scale_text_radius_mm = dial_settings.getfloat('scale_text_radius_mm', 29)
-    font_size = dial_settings.getint('font_size', 12)
-    font_family = dial_settings.get('font_family', 'Helvetica')
-
-    if 'MajorTickPositions' in config:
-        major_tick_positions = {}
-        for temp_str, angle_str in config['MajorTickPositions'].items():
-            temp = float(temp_str)
-            angle = float(angle_str)
-            major_tick_positions[temp] = angle
-    else:
-        major_tick_positions = None
+        DialSpec: All parameters for drawing the dial. The filename is resolved against the
+            dials output directory.
+    """
+    with (metrics or NULL_METRICS).phase('read_config'):
+        spec = DialSpec.from_ini(config_file_path)
+    os.makedirs(output_dir, exist_ok=True)
+    return spec.replace(filename=os.path.join(output_dir, spec.filename))
+
+
+def resolve_major_tick_positions(spec):
+    """
+    Turn the configured major tick positions into physical angles on the page.
 
-    return (filename, dial_radius_mm, temperature_start, temperature_end, angle_start, angle_end,
-            scale_division, minor_tick_division, major_tick_positions,
-            major_tick_length_mm, major_tick_width, minor_tick_length_mm,
-            minor_tick_width, middle_minor_tick_length_mm, scale_text_radius_mm,
-            font_size, font_family, major_tick_inner_width)
+    Parameters:
+        spec (DialSpec): The dial. If it has no major_tick_positions they are distributed evenly.
+
+    Returns:
+        dict: {temp: physical_angle} for every major tick.
+    """
+    if spec.major_tick_positions is None:
+        # If no major_tick_positions are given, distribute them evenly
+        return even_major_tick_positions(spec.temperature_start, spec.temperature_end, spec.angle_start,
+                                         spec.angle_end, spec.major_tick_division, physical_start_angle)
 
+    # Adjust the provided major ticks by adding physical_start_angle
+    return {temp: physical_start_angle + angle_offset for temp, angle_offset in spec.major_tick_positions}
 
-def interpolate_angles(temperature_start, temperature_end, major_tick_positions, scale_division, minor_tick_division):
+
+def interpolate_angles(temperature_start, temperature_end, major_tick_positions, scale_division, minor_tick_division,
+                       interpolation='linear'):
     """
     Interpolate angles for minor tick marks between defined major tick positions.
 
+    Kept for callers that want plain dictionaries; the renderer itself works on the
+    TickTable returned by compute_tick_table.
+
     Parameters:
         temperature_start (float): The starting temperature of the scale.
         temperature_end (float): The ending temperature of the scale.
         major_tick_positions (dict): A dictionary of major ticks {temp: angle}.
         scale_division (float): The temperature difference between major ticks.
-        minor_tick_division (int): The temperature increment between minor ticks.
+        minor_tick_division (float): The temperature increment between minor ticks.
+        interpolation (str): 'linear' or 'pchip', see compute_tick_table.
 
     Returns:
         tuple:
             interpolated_angles (dict): {temp: angle} for major ticks (including interpolated major).
             minor_tick_angles (dict): {temp: angle} for minor ticks.
     """
-    sorted_temps = sorted(major_tick_positions.keys())
+    tick_table = compute_tick_table(major_tick_positions, scale_division, minor_tick_division, interpolation)
+    is_major = tick_table.kind == MAJOR
+    temps = tick_table.temps.tolist()
+    angles = tick_table.angles.tolist()
+
     interpolated_angles = {}
     minor_tick_angles = {}
-
-    # Interpolate between defined major ticks
-    for i in range(len(sorted_temps) - 1):
-        temp1 = sorted_temps[i]
-        temp2 = sorted_temps[i + 1]
-        angle1 = major_tick_positions[temp1]
-        angle2 = major_tick_positions[temp2]
-        temp_range = temp2 - temp1
-        angle_range = angle2 - angle1
-        steps = int(temp_range / minor_tick_division)
-
-        for j in range(steps + 1):
-            temp = temp1 + j * minor_tick_division
-            if temp <= temp2:
-                angle = angle1 + ((temp - temp1) / temp_range) * angle_range
-                if temp % scale_division == 0:
-                    # This is a major tick
-                    interpolated_angles[temp] = angle
-                else:
-                    # This is a minor tick
-                    minor_tick_angles[temp] = angle
+    for temp, angle, major in zip(temps, angles, is_major.tolist()):
+        if major:
+            interpolated_angles[temp] = angle
+        else:
+            minor_tick_angles[temp] = angle
 
     return interpolated_angles, minor_tick_angles
 
 
-def draw_minor_ticks(c, center_x, center_y, dial_radius, minor_tick_angles, scale_division,
-                     minor_tick_division, minor_tick_length, middle_minor_tick_length, minor_tick_width):
+class SegmentPath:
+    """
+    Line segments of one width, added in any number of chunks and stroked as one path.
+
+    Parameters:
+        c (canvas.Canvas): The ReportLab canvas object.
+        line_width (float): Line width for all segments.
+        batch_paths (bool): Emit all segments as a single path when draw() is called. If False,
+            every segment is drawn as its own line as soon as it is added.
+    """
+
+    def __init__(self, c, line_width, batch_paths=True):
+        self.c = c
+        self.line_width = line_width
+        self.batch_paths = batch_paths
+        self._code = ['n']
+        self._width_set = False
+
+    def add(self, segments):
+        """Add (x_start, y_start, x_end, y_end) arrays."""
+        if len(segments[0]) == 0:
+            return
+        if not self.batch_paths:
+            if not self._width_set:
+                self.c.setLineWidth(self.line_width)
+                self._width_set = True
+            for x_start, y_start, x_end, y_end in zip(*(a.tolist() for a in segments)):
+                self.c.line(x_start, y_start, x_end, y_end)
+            return
+        # Build the path code directly: formatting every coordinate through moveTo/lineTo
+        # (fp_str) dominates the render time of dense scales. 1/1000 pt is far below
+        # anything a printer can resolve. Each chunk is kept as one string, not one per segment.
+        rounded = (np.round(a, 3).tolist() for a in segments)
+        self._code.append(' '.join('%r %r m %r %r l' % segment for segment in zip(*rounded)))
+
+    def draw(self):
+        """Stroke everything added so far as one path."""
+        if len(self._code) > 1:
+            from reportlab.pdfgen.pathobject import PDFPathObject
+
+            self.c.setLineWidth(self.line_width)
+            self.c.drawPath(PDFPathObject(code=self._code), stroke=1, fill=0)
+        # The path object stays alive in a reference cycle until the next garbage collection and
+        # keeps this list; emptying it in place frees the segment strings right away
+        del self._code[1:]
+
+
+def draw_segments(c, segments, line_width, batch_paths=True):
+    """
+    Stroke a set of line segments with a common line width.
+
+    Parameters:
+        c (canvas.Canvas): The ReportLab canvas object.
+        segments (tuple): (x_start, y_start, x_end, y_end) arrays.
+        line_width (float): Line width for all segments.
+        batch_paths (bool): Emit all segments as a single path instead of one line per segment.
+    """
+    path = SegmentPath(c, line_width, batch_paths)
+    path.add(segments)
+    path.draw()
+
+
+def minor_tick_segments(tick_table, center_x, center_y, dial_radius, minor_tick_length, middle_minor_tick_length):
+    """Segments of the minor and middle minor ticks of a TickTable, see draw_minor_ticks."""
+    mask = tick_table.mask(MINOR, MIDDLE_MINOR)
+
+    # "Middle" minor ticks (half-way between majors) are longer than regular minor ticks
+    tick_length = np.where(tick_table.kind[mask] == MIDDLE_MINOR, middle_minor_tick_length, minor_tick_length)
+    return tick_table.segments(center_x, center_y, dial_radius - tick_length, dial_radius, mask)
+
+
+def draw_minor_ticks(c, center_x, center_y, dial_radius, tick_table, minor_tick_length,
+                     middle_minor_tick_length, minor_tick_width, batch_paths=True):
     """
     Draw the minor tick marks on the dial.
 
@@ -129,199 +194,388 @@ def draw_minor_ticks(c, center_x, center_y, dial_radius, minor_tick_angles, scal
         c (canvas.Canvas): The ReportLab canvas object.
         center_x, center_y (float): Coordinates of the dial center.
         dial_radius (float): The radius of the dial in points.
-        minor_tick_angles (dict): {temp: angle} for minor ticks.
-        scale_division (float): Temperature difference between major ticks.
-        minor_tick_division (int): Temperature step between minor ticks.
+        tick_table (TickTable): Tick geometry from compute_tick_table.
         minor_tick_length (float): Length of the regular minor ticks in points.
         middle_minor_tick_length (float): Length of the intermediate minor ticks (like half-step ticks).
         minor_tick_width (float): Line width for minor ticks.
+        batch_paths (bool): Stroke all minor ticks as one path instead of one line per tick.
     """
-    for temp, physical_angle in minor_tick_angles.items():
-        rad_angle = math.radians(360 - physical_angle)
+    segments = minor_tick_segments(tick_table, center_x, center_y, dial_radius,
+                                   minor_tick_length, middle_minor_tick_length)
+    draw_segments(c, segments, minor_tick_width, batch_paths)
 
-        # Decide tick length based on whether it's a "middle" minor tick or a regular minor tick
-        if temp % (scale_division / 2) == 0:
-            tick_length = middle_minor_tick_length
-        else:
-            tick_length = minor_tick_length
 
-        x_start = center_x + (dial_radius - tick_length) * math.cos(rad_angle)
-        y_start = center_y + (dial_radius - tick_length) * math.sin(rad_angle)
-        x_end = center_x + dial_radius * math.cos(rad_angle)
-        y_end = center_y + dial_radius * math.sin(rad_angle)
+def draw_minor_ticks_streaming(c, center_x, center_y, dial_radius, tick_scale, minor_tick_length,
+                               middle_minor_tick_length, minor_tick_width, batch_paths=True,
+                               chunk_size=None, progress=None):
+    """
+    Draw the minor tick marks chunk by chunk, without ever holding the whole scale.
 
-        c.setLineWidth(minor_tick_width)
-        c.line(x_start, y_start, x_end, y_end)
+    The segments are those draw_minor_ticks draws for the full TickTable, but every chunk is
+    stroked as its own path as soon as it is computed. The major ticks seen on the way are returned, so they and their labels can be drawn afterwards
+    without a second pass over the scale.
 
+    Parameters:
+        tick_scale (TickScale): The scale to draw.
+        chunk_size (int or None): Ticks computed at a time (default: STREAM_CHUNK_TICKS).
+        progress (callable or None): Called as progress('minor ticks', fraction) before each chunk,
+            fraction being the part of the scale drawn so far, so a cancel takes effect mid-scale.
+        Other parameters are those of draw_minor_ticks.
 
-def draw_major_ticks_and_labels(c, center_x, center_y, dial_radius, major_tick_positions,
-                                major_tick_length, major_tick_width, font_family, font_size, scale_text_radius, major_tick_inner_width):
+    Returns:
+        TickTable: The major ticks of the scale.
     """
-    Draw the major tick marks and their associated temperature labels.
+    if progress is None:
+        progress = _no_progress
+    path = SegmentPath(c, minor_tick_width, batch_paths)
+    majors = []
+    done = 0
+    for chunk in tick_scale.chunks(chunk_size or STREAM_CHUNK_TICKS):
+        progress('minor ticks', done / tick_scale.count)
+        done += len(chunk)
+        path.add(minor_tick_segments(chunk, center_x, center_y, dial_radius,
+                                     minor_tick_length, middle_minor_tick_length))
+        # Stroke every chunk right away, so only the canvas's content stream grows with the scale
+        path.draw()
+        majors.append(chunk.subset(chunk.kind == MAJOR))
+    return TickTable.concatenate(majors)
+
+
+def draw_major_ticks(c, center_x, center_y, dial_radius, tick_table,
+                     major_tick_length, major_tick_width, major_tick_inner_width, batch_paths=True):
+    """
+    Draw the major tick marks. Each mark has a wide inner half and a narrower outer half.
 
     Parameters:
         c (canvas.Canvas): The ReportLab canvas object.
         center_x, center_y (float): Coordinates of the dial center.
         dial_radius (float): Radius of the dial in points.
-        major_tick_positions (dict): {temp: angle} with angles for major ticks.
+        tick_table (TickTable): Tick geometry from compute_tick_table.
         major_tick_length (float): Length of major ticks in points.
-        major_tick_width (float): Line width for major ticks.
-        font_family (str): Font family for the tick labels.
-        font_size (int): Font size for the tick labels.
-        scale_text_radius (float): The radius at which to place the scale numbers (inside the dial).
+        major_tick_width (float): Line width for the outer half of major ticks.
+        major_tick_inner_width (float): Line width for the inner half of major ticks.
+        batch_paths (bool): Stroke all inner and all outer major marks as one path each, instead of
+            switching the line width twice per major tick.
     """
-    # This offset may be reduced or adjusted as needed
-    text_offset = 0  # Start at 0 since we're now using scale_text_radius
-    epsilon = 1e-6
-
     #Halfway points of the major tick
     half_tick_length = major_tick_length / 2.0
 
-    for temp, physical_angle in major_tick_positions.items():
-        rad_angle = math.radians(360 - physical_angle)
-
-        # Coordinates of inner major mark
-        x_inner_start = center_x + (dial_radius - major_tick_length) * math.cos(rad_angle)
-        y_inner_start = center_y + (dial_radius - major_tick_length) * math.sin(rad_angle)
-        x_inner_end = center_x + (dial_radius - half_tick_length) * math.cos(rad_angle)
-        y_inner_end = center_y + (dial_radius - half_tick_length) * math.sin(rad_angle)
+    mask = tick_table.mask(MAJOR)
+    inner = tick_table.segments(center_x, center_y, dial_radius - major_tick_length, dial_radius - half_tick_length, mask)
+    outer = tick_table.segments(center_x, center_y, dial_radius - half_tick_length, dial_radius, mask)
 
-        # Coordinates of outer major mark
-        x_outer_start = x_inner_end
-        y_outer_start = y_inner_end
-        x_outer_end = center_x + dial_radius * math.cos(rad_angle)
-        y_outer_end = center_y + dial_radius * math.sin(rad_angle)
+    if batch_paths:
+        draw_segments(c, inner, major_tick_inner_width)
+        draw_segments(c, outer, major_tick_width)
+        return
 
+    for xi0, yi0, xi1, yi1, xo0, yo0, xo1, yo1 in zip(*(a.tolist() for a in inner + outer)):
         #draw inner major mark
         c.setLineWidth(major_tick_inner_width)
-        c.line(x_inner_start, y_inner_start, x_inner_end, y_inner_end)
+        c.line(xi0, yi0, xi1, yi1)
 
         #draw outer major mark
         c.setLineWidth(major_tick_width)
-        c.line(x_outer_start, y_outer_start, x_outer_end, y_outer_end)
+        c.line(xo0, yo0, xo1, yo1)
+
 
-        # Position text inside the scale at scale_text_radius
-        # Adjust scale_text_radius_mm in your config to move text in or out.
-        x_text = center_x + (scale_text_radius) * math.cos(rad_angle)
-        y_text = center_y + (scale_text_radius) * math.sin(rad_angle)
+def label_mask(tick_table, label_step=1):
+    """Mask of the major ticks that get a label: every label_step-th one, starting with the first."""
+    mask = tick_table.mask(MAJOR)
+    if label_step > 1:
+        labelled = np.flatnonzero(mask)[::label_step]
+        mask = np.zeros_like(mask)
+        mask[labelled] = True
+    return mask
 
-        c.setFont(font_family, font_size)
 
+def draw_labels(c, center_x, center_y, tick_table, font_family, font_size, scale_text_radius, label_step=1):
+    """
+    Draw the temperature labels of the major ticks.
+
+    Parameters:
+        c (canvas.Canvas): The ReportLab canvas object.
+        center_x, center_y (float): Coordinates of the dial center.
+        tick_table (TickTable): Tick geometry from compute_tick_table.
+        font_family (str): Font family for the tick labels.
+        font_size (int): Font size for the tick labels.
+        scale_text_radius (float): The radius at which to place the scale numbers (inside the dial).
+        label_step (int): Label only every label_step-th major tick.
+    """
+    epsilon = 1e-6
+
+    mask = label_mask(tick_table, label_step)
+    # Position text inside the scale at scale_text_radius
+    # Adjust scale_text_radius_mm in your config to move text in or out.
+    x_text, y_text, _, _ = tick_table.segments(center_x, center_y, scale_text_radius, scale_text_radius, mask)
+    # If the tick is nearly horizontal, the label gets adjusted vertically for better centering
+    horizontal = np.abs(tick_table.sin[mask]) < epsilon
+
+    ensure_font(font_family)
+    c.setFont(font_family, font_size)
+    for temp, xt, yt, is_horizontal in zip(tick_table.temps[mask].tolist(), x_text.tolist(), y_text.tolist(),
+                                           horizontal.tolist()):
         # Save graphics state before transformations
         c.saveState()
 
         # Move to the text position
-        c.translate(x_text, y_text)
+        c.translate(xt, yt)
 
-        # If the line is nearly horizontal, adjust text vertically for better centering
-        if abs(y_outer_start - y_outer_end) < epsilon:
+        if is_horizontal:
             # Adjust vertical offset if needed; try different values if not centered perfectly
             vertical_offset = font_size * 0.3  # Experiment with this value
             c.translate(0, -vertical_offset)
 
         # Draw the label, centered
         # Text remains horizontal; if you want to rotate it tangentially, consider c.rotate(...) here
-        c.drawCentredString(0, 0, str(int(temp)))
+        text = str(int(temp))
+        c.drawString(-0.5 * label_width(text, font_family, font_size), 0, text)
 
         # Restore state
         c.restoreState()
 
 
-def draw_thermometer_dial(filename, dial_radius_mm, temperature_start, temperature_end, angle_start, angle_end,
-                          scale_division, minor_tick_division, major_tick_positions,
-                          major_tick_length_mm, major_tick_width, minor_tick_length_mm,
-                          minor_tick_width, middle_minor_tick_length_mm, scale_text_radius_mm,
-                          font_size, font_family, major_tick_inner_width):
+def draw_major_ticks_and_labels(c, center_x, center_y, dial_radius, tick_table,
+                                major_tick_length, major_tick_width, font_family, font_size, scale_text_radius, major_tick_inner_width,
+                                batch_paths=True, label_step=1):
+    """
+    Draw the major tick marks and their associated temperature labels.
+
+    Parameters are those of draw_major_ticks and draw_labels.
+    """
+    draw_major_ticks(c, center_x, center_y, dial_radius, tick_table,
+                     major_tick_length, major_tick_width, major_tick_inner_width, batch_paths)
+    draw_labels(c, center_x, center_y, tick_table, font_family, font_size, scale_text_radius, label_step)
+
+
+def draw_thermometer_dial(spec, filename=None, batch_paths=True, progress=None, metrics=None, invariant=None):
     """
     Draw a thermometer-style dial as a PDF.
 
     Parameters:
-        filename (str): Output PDF filename.
-        dial_radius_mm (float): Radius of the dial in millimeters.
-        temperature_start (float): Starting temperature of the scale.
-        temperature_end (float): Ending temperature of the scale.
-        angle_start (float): Starting angle offset for temperature_start.
-        angle_end (float): Ending angle offset for temperature_end.
-        scale_division (float): Temperature difference between major ticks.
-        minor_tick_division (int): Temperature increment for minor ticks.
-        major_tick_positions (dict or None): If not None, user-defined major tick positions {temp: angle_offset}.
-        major_tick_length_mm (float): Length of major ticks in mm.
-        major_tick_width (float): Line width for major ticks.
-        minor_tick_length_mm (float): Length of regular minor ticks in mm.
-        minor_tick_width (float): Line width for minor ticks.
-        middle_minor_tick_length_mm (float): Length of intermediate minor ticks in mm.
-        scale_text_radius_mm (float): Radius at which text labels will be placed.
-        font_size (int): Font size for text labels.
-        font_family (str): Font family for text labels.
+        spec (DialSpec): All settings of the dial.
+        filename (str or None): Output PDF filename (default: spec.filename).
+        batch_paths (bool): Group tick segments of the same width into single paths. This keeps the
+            content stream small; pass False for the legacy one-line-per-tick output.
+        progress (callable or None): Called as progress(phase, fraction) between the rendering phases
+            and per chunk of a streamed scale. It may raise RenderCancelled to abort the render before
+            anything is written; a cancel that arrives after the PDF is saved is ignored.
+        metrics (RenderMetrics or None): Records per-phase timings and counters of the render and
+            runs its hooks when the PDF is written.
+        invariant (bool or None): Write a reproducible PDF with a fixed creation date and a document ID
+            derived from the content, so the same spec always gives the same bytes. None leaves it to
+            ReportLab's rl_config.invariant, which is off by default.
     """
-    # The physical_start_angle shifts the entire scale. If 135 degrees is chosen,
-    # it might mean that the "0" angle visually appears at top-left quadrant.
-    # Adjust this angle as needed to orient your scale correctly.
-    physical_start_angle = 135  # degrees
+    if filename is None:
+        filename = spec.filename
+    render_dial(spec, filename, batch_paths, progress, metrics, invariant=invariant)
+    print(f"Thermometer dial saved as {filename}")
 
-    # Convert dimensions from mm to points (ReportLab works in points)
-    dial_radius = dial_radius_mm * mm
-    major_tick_length = major_tick_length_mm * mm
-    minor_tick_length = minor_tick_length_mm * mm
-    middle_minor_tick_length = middle_minor_tick_length_mm * mm
-    # scale_text_radius is currently unused, but retained for future customization
-    scale_text_radius = scale_text_radius_mm * mm
-
-    page_size = (dial_radius * 2 + 20 * mm, dial_radius * 2 + 20 * mm)
-    c = canvas.Canvas(filename, pagesize=page_size)
-
-    center_x = page_size[0] / 2
-    center_y = page_size[1] / 2
-
-    # If no major_tick_positions are given, distribute them evenly
-    if major_tick_positions is None:
-        major_tick_positions = {}
-        total_steps = int((temperature_end - temperature_start) / scale_division)
-        for i in range(total_steps + 1):
-            temp = temperature_start + i * scale_division
-            angle_offset = ((temp - temperature_start) / (temperature_end - temperature_start)) * (angle_end - angle_start) + angle_start
-            physical_angle = physical_start_angle + angle_offset
-            major_tick_positions[temp] = physical_angle
-
-        interpolated_angles, minor_tick_angles = interpolate_angles(temperature_start, temperature_end,
-                                                                    major_tick_positions, scale_division, minor_tick_division)
-    else:
-        # Adjust the provided major ticks by adding physical_start_angle
-        adjusted_major_tick_positions = {}
-        for temp, angle_offset in major_tick_positions.items():
-            physical_angle = physical_start_angle + angle_offset
-            adjusted_major_tick_positions[temp] = physical_angle
 
-        interpolated_angles, minor_tick_angles = interpolate_angles(temperature_start, temperature_end,
-                                                                    adjusted_major_tick_positions, scale_division, minor_tick_division)
-        major_tick_positions = interpolated_angles
+def render_to_bytes(spec, batch_paths=True, progress=None, metrics=None, invariant=None):
+    """
+    Render a dial in memory, without touching the filesystem.
+
+    Parameters:
+        spec (DialSpec): All settings of the dial; the filename is ignored.
+        batch_paths (bool): See draw_thermometer_dial.
+        progress (callable or None): See draw_thermometer_dial.
+        metrics (RenderMetrics or None): See draw_thermometer_dial.
+        invariant (bool or None): See draw_thermometer_dial.
 
-    # Draw minor ticks
-    draw_minor_ticks(c, center_x, center_y, dial_radius, minor_tick_angles, scale_division,
-                     minor_tick_division, minor_tick_length, middle_minor_tick_length, minor_tick_width)
+    Returns:
+        bytes: The PDF document.
+    """
+    buffer = io.BytesIO()
+    render_dial(spec, buffer, batch_paths, progress, metrics, invariant=invariant)
+    return buffer.getvalue()
 
-    # Draw major ticks and labels
-    draw_major_ticks_and_labels(c, center_x, center_y, dial_radius, major_tick_positions,
-                                major_tick_length, major_tick_width, font_family, font_size, scale_text_radius, major_tick_inner_width)
 
-    # Show the page and save the final result
-    c.showPage()
-    c.save()
-    print(f"Thermometer dial saved as {filename}")
+def dial_page_size(spec):
+    """Width and height in points of the page a single dial is rendered on."""
+    side = spec.outer_radius_mm() * mm * 2 + 20 * mm
+    return side, side
+
+
+def ring_tick_tables(spec, primary=None):
+    """
+    Ticks of the extra scale rings of a dial.
+
+    Parameters:
+        spec (DialSpec): All settings of the dial.
+        primary (TickScale or None): Scale of the dial, whose calibration all rings share.
+            Built from the spec if None.
+
+    Returns:
+        list: (DialSpec, TickTable) per ring, the spec holding the ring's own settings and the
+            table its values and angles.
+    """
+    rings = spec.ring_specs()
+    if not rings:
+        return []
+    if primary is None:
+        primary = TickScale(resolve_major_tick_positions(spec), spec.major_tick_division, spec.minor_tick_division,
+                            spec.interpolation)
+    return [(ring, RingScale(primary, unit_scale, unit_offset, ring.major_tick_division,
+                             ring.minor_tick_division).table())
+            for ring, unit_scale, unit_offset in rings]
+
+
+def draw_dial_face(c, spec, center_x, center_y, batch_paths=True, progress=None, metrics=None, tick_table=None,
+                   stream=None):
+    """
+    Draw all ticks and labels of a dial around a given center on an existing canvas.
+
+    Parameters:
+        c (canvas.Canvas): The ReportLab canvas (or a form being recorded on it).
+        spec (DialSpec): All settings of the dial.
+        center_x, center_y (float): Dial center in points.
+        batch_paths (bool): See draw_thermometer_dial.
+        progress (callable or None): See draw_thermometer_dial.
+        metrics (RenderMetrics or None): See draw_thermometer_dial.
+        tick_table (TickTable or None): Ticks computed earlier for the same spec, e.g. when the same
+            face is drawn into many documents. Computed from the spec if None.
+        stream (bool or None): Compute and draw the minor ticks in chunks instead of holding the
+            whole scale in memory; the page looks the same either way, but every chunk is its own
+            path. Memory then grows only with ReportLab's content stream, about 35 bytes per minor
+            tick, which the canvas holds until the page is saved (saving briefly needs about three
+            times that). None streams scales with STREAM_MIN_TICKS ticks or more.
+    """
+    if progress is None:
+        progress = _no_progress
+    if metrics is None:
+        metrics = NULL_METRICS
+
+    # Convert dimensions from mm to points (ReportLab works in points)
+    dial_radius = spec.dial_radius_mm * mm
+    major_tick_length = spec.major_tick_length_mm * mm
+    minor_tick_length = spec.minor_tick_length_mm * mm
+    middle_minor_tick_length = spec.middle_minor_tick_length_mm * mm
+    scale_text_radius = spec.scale_text_radius_mm * mm
+
+    progress('geometry', 0.0)
+    tick_scale = primary = None
+    if tick_table is None:
+        with metrics.phase('tick_positions'):
+            major_tick_positions = resolve_major_tick_positions(spec)
+
+        # Compute all tick angles and directions in one batched pass
+        with metrics.phase('interpolate_angles'):
+            tick_scale = TickScale(major_tick_positions, spec.major_tick_division, spec.minor_tick_division,
+                                   spec.interpolation)
+            primary = tick_scale
+            if stream is None:
+                stream = tick_scale.count >= STREAM_MIN_TICKS
+            if not stream:
+                tick_table = tick_scale.table()
+                tick_scale = None
+
+    # Draw minor ticks
+    progress('minor ticks', 0.2)
+    with metrics.phase('minor_ticks'):
+        if tick_scale is not None:
+            tick_count = tick_scale.count
+            # Only the major ticks are kept for the remaining phases
+            tick_table = draw_minor_ticks_streaming(
+                c, center_x, center_y, dial_radius, tick_scale, minor_tick_length, middle_minor_tick_length,
+                spec.minor_tick_width, batch_paths,
+                progress=lambda phase, fraction: progress(phase, 0.2 + 0.3 * fraction))
+        else:
+            tick_count = len(tick_table)
+            draw_minor_ticks(c, center_x, center_y, dial_radius, tick_table,
+                             minor_tick_length, middle_minor_tick_length, spec.minor_tick_width, batch_paths)
+
+    # Draw major ticks
+    progress('major ticks', 0.5)
+    with metrics.phase('major_ticks'):
+        draw_major_ticks(c, center_x, center_y, dial_radius, tick_table,
+                         major_tick_length, spec.major_tick_width, spec.major_tick_inner_width, batch_paths)
+
+    # Draw labels
+    progress('labels', 0.6)
+    with metrics.phase('labels'):
+        mask = label_mask(tick_table, spec.label_step)
+        draw_labels(c, center_x, center_y, tick_table, spec.font_family, spec.font_size, scale_text_radius,
+                    spec.label_step)
+
+    label_count = int(np.count_nonzero(mask))
+
+    # Draw the extra scale rings, all on the dial's calibration
+    if spec.rings:
+        progress('rings', 0.8)
+        with metrics.phase('rings'):
+            for ring, ring_table in ring_tick_tables(spec, primary):
+                ring_radius = ring.dial_radius_mm * mm
+                draw_minor_ticks(c, center_x, center_y, ring_radius, ring_table, ring.minor_tick_length_mm * mm,
+                                 ring.middle_minor_tick_length_mm * mm, ring.minor_tick_width, batch_paths)
+                draw_major_ticks(c, center_x, center_y, ring_radius, ring_table, ring.major_tick_length_mm * mm,
+                                 ring.major_tick_width, ring.major_tick_inner_width, batch_paths)
+                draw_labels(c, center_x, center_y, ring_table, ring.font_family, ring.font_size,
+                            ring.scale_text_radius_mm * mm, ring.label_step)
+                tick_count += len(ring_table)
+                label_count += int(np.count_nonzero(label_mask(ring_table, ring.label_step)))
+
+    metrics.count('ticks', tick_count)
+    metrics.count('labels', label_count)
+
+
+def render_dial(spec, output, batch_paths=True, progress=None, metrics=None, stream=None, tick_table=None,
+                invariant=None):
+    """
+    Render a dial to a PDF.
+
+    Parameters:
+        spec (DialSpec): All settings of the dial.
+        output (str or file): Output filename, or a writable binary file object.
+        batch_paths (bool): See draw_thermometer_dial.
+        progress (callable or None): See draw_thermometer_dial.
+        metrics (RenderMetrics or None): See draw_thermometer_dial.
+        stream (bool or None): See draw_dial_face.
+        tick_table (TickTable or None): See draw_dial_face.
+        invariant (bool or None): See draw_thermometer_dial.
+    """
+    if progress is None:
+        progress = _no_progress
+    if metrics is None:
+        metrics = NULL_METRICS
+    start_offset = 0 if isinstance(output, str) else output.tell()
+
+    from reportlab.pdfgen import canvas
+
+    page_size = dial_page_size(spec)
+    c = canvas.Canvas(output, pagesize=page_size, invariant=invariant)
+    draw_dial_face(c, spec, page_size[0] / 2, page_size[1] / 2, batch_paths, progress, metrics, tick_table,
+                   stream)
+
+    # Show the page and save the final result. This is the last point a render can be cancelled:
+    # once the PDF is written, the caller gets it.
+    progress('saving', 0.9)
+    with metrics.phase('serialize'):
+        c.showPage()
+        c.save()
+
+    if metrics is not NULL_METRICS:
+        metrics.label(filename=output if isinstance(output, str) else os.path.basename(spec.filename))
+        metrics.count('bytes', os.path.getsize(output) if isinstance(output, str) else output.tell() - start_offset)
+        metrics.finish()
+    try:
+        progress('done', 1.0)
+    except RenderCancelled:
+        pass
 
 
 if __name__ == "__main__":
+    import sys
+
+    if '--watch' in sys.argv[1:]:
+        # Keep running and re-render whenever config.ini changes, see src.watch
+        from .watch import main as watch_main
+        sys.exit(watch_main([arg for arg in sys.argv[1:] if arg != '--watch']))
     if not os.path.exists(config_file_path):
         print(f"Configuration file '{config_file_path}' not found.")
     else:
-        (filename, dial_radius_mm, temperature_start, temperature_end, angle_start, angle_end,
-         scale_division, minor_tick_division, major_tick_positions,
-         major_tick_length_mm, major_tick_width, minor_tick_length_mm,
-         minor_tick_width, middle_minor_tick_length_mm, scale_text_radius,
-         font_size, font_family, major_tick_inner_width) = read_config(config_file_path)
-
-        draw_thermometer_dial(filename, dial_radius_mm, temperature_start, temperature_end, angle_start, angle_end,
-                              scale_division, minor_tick_division, major_tick_positions,
-                              major_tick_length_mm, major_tick_width, minor_tick_length_mm,
-                              minor_tick_width, middle_minor_tick_length_mm, scale_text_radius,
-                              font_size, font_family, major_tick_inner_width)
\ No newline at end of file
+        # Set DIAL_METRICS=1 to get a JSON line with per-phase timings on stderr
+        metrics = RenderMetrics(hooks=[json_log_hook()]) if os.environ.get('DIAL_METRICS') else None
+        # --reproducible writes the same bytes for the same config.ini, e.g. to diff or cache the PDF
+        draw_thermometer_dial(read_config(config_file_path, metrics), metrics=metrics,
+                              invariant=True if '--reproducible' in sys.argv[1:] else None)
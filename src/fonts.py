@@ -0,0 +1,279 @@
+"""
+Bundled fonts: lazy ReportLab registration and a persistent metrics cache.
+
+Registering a TrueType font with ReportLab parses the whole file, so it is done on
+first use (ensure_font) instead of at import time; the GUI and tools that never draw
+text in a PDF do not pay for it at all. ReportLab itself is only imported then, too.
+
+Backends that only need metrics (toolpath export, label layout) read them through
+font_metrics: advance widths and glyph outlines are parsed once and stored as JSON in
+a cache directory, keyed by the SHA-256 of the font file, so later processes load
+them without touching the TTF parser. The cache directory defaults to
+~/.cache/dialgenerator and can be moved with the DIAL_FONT_CACHE environment variable.
+"""
+import hashlib
+import json
+import os
+import struct
+import sys
+from functools import lru_cache
+
+if getattr(sys, 'frozen', False):
+    # Running inside a PyInstaller bundle
+    base_path = sys._MEIPASS
+else:
+    # Running normally (not frozen)
+    base_path = os.path.dirname(os.path.abspath(__file__))
+
+font_path = os.path.join(base_path, 'font', 'din1451ef.ttf')
+
+# Font name -> TTF file of the fonts shipped with the dial generator
+BUNDLED_FONTS = {'din1451ef': font_path}
+
+font_cache_dir = os.environ.get('DIAL_FONT_CACHE') or os.path.join(os.path.expanduser('~'), '.cache',
+                                                                   'dialgenerator')
+
+# TrueType composite glyph flags
+ARG_1_AND_2_ARE_WORDS = 0x0001
+ARGS_ARE_XY_VALUES = 0x0002
+WE_HAVE_A_SCALE = 0x0008
+MORE_COMPONENTS = 0x0020
+WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+WE_HAVE_A_TWO_BY_TWO = 0x0080
+
+_registered = set()
+_digests = {}
+_metrics = {}
+
+
+def ensure_font(font_family):
+    """
+    Register a bundled font with ReportLab the first time it is used.
+
+    Fonts that are not bundled (the standard PDF fonts, or fonts registered by the caller)
+    are left alone.
+    """
+    if font_family in _registered or font_family not in BUNDLED_FONTS:
+        return
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if font_family not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(font_family, BUNDLED_FONTS[font_family]))
+    _registered.add(font_family)
+
+
+def font_available(font_family):
+    """
+    Whether a font can be drawn with: a bundled font, a standard PDF font or one registered with ReportLab.
+    """
+    if font_family in BUNDLED_FONTS:
+        return True
+    from reportlab.pdfbase import pdfmetrics
+
+    try:
+        pdfmetrics.getFont(font_family)
+    except KeyError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=4096)
+def label_width(text, font_family, font_size):
+    """Width of a label in points, as used by drawCentredString, memoized across renders."""
+    from reportlab.pdfbase import pdfmetrics
+
+    ensure_font(font_family)
+    return pdfmetrics.stringWidth(text, font_family, font_size)
+
+
+def font_digest(path=font_path):
+    """SHA-256 of a font file, computed once per process and file version."""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    if key not in _digests:
+        with open(path, 'rb') as f:
+            _digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return _digests[key]
+
+
+class FontMetrics:
+    """
+    Advance widths and glyph outlines of a font.
+
+    Attributes:
+        units_per_em (int): Font units per em of the outlines.
+        widths (dict): Code point -> advance width in 1/1000 em.
+        default_width (float): Advance width of characters missing from widths.
+        outlines (dict): Character -> contours, each a list of (x, y, on_curve) points in font units.
+    """
+
+    def __init__(self, units_per_em, widths, default_width, outlines):
+        self.units_per_em = units_per_em
+        self.widths = widths
+        self.default_width = default_width
+        self.outlines = outlines
+
+    def advance(self, char):
+        """Advance width of a character in 1/1000 em."""
+        return self.widths.get(ord(char), self.default_width)
+
+    def string_width(self, text, font_size):
+        """Width of a string in points (same as pdfmetrics.stringWidth, no kerning)."""
+        return sum(self.advance(char) for char in text) * 0.001 * font_size
+
+    def contours(self, char):
+        """Outline contours of a character, empty for blanks and unknown characters."""
+        return self.outlines.get(char, [])
+
+    def to_dict(self):
+        return {
+            'units_per_em': self.units_per_em,
+            'widths': {str(code): width for code, width in self.widths.items()},
+            'default_width': self.default_width,
+            'outlines': {char: [[list(point) for point in contour] for contour in contours]
+                         for char, contours in self.outlines.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['units_per_em'], {int(code): width for code, width in data['widths'].items()},
+                   data['default_width'],
+                   {char: [[(x, y, bool(on)) for x, y, on in contour] for contour in contours]
+                    for char, contours in data['outlines'].items()})
+
+    @classmethod
+    def from_ttf(cls, path):
+        """Parse widths and the outline of every mapped character from a TrueType file."""
+        from reportlab.pdfbase.ttfonts import TTFontFile
+
+        font = TTFontFile(path)
+        glyf = font.get_table('glyf')
+        outlines = {}
+        for code, glyph in font.charToGlyph.items():
+            contours = _glyph_contours(glyf, font.glyphPos, glyph)
+            if contours:
+                outlines[chr(code)] = contours
+        # ReportLab scales advance widths to 1000 units per em
+        return cls(font.unitsPerEm, dict(font.charWidths), font.defaultWidth, outlines)
+
+
+def font_metrics(font_family='din1451ef', cache_dir=None):
+    """
+    Metrics of a bundled font, from the persistent cache if possible.
+
+    Parameters:
+        font_family (str): Name in BUNDLED_FONTS.
+        cache_dir (str or None): Cache directory (default: font_cache_dir).
+
+    Returns:
+        FontMetrics: The metrics; loaded once per process.
+    """
+    if font_family not in BUNDLED_FONTS:
+        raise ValueError(f"No metrics for font '{font_family}'; available: {', '.join(BUNDLED_FONTS)}")
+    path = BUNDLED_FONTS[font_family]
+    digest = font_digest(path)
+    if digest in _metrics:
+        return _metrics[digest]
+
+    cache_file = os.path.join(cache_dir or font_cache_dir, f"font-{digest}.json")
+    metrics = None
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            metrics = FontMetrics.from_dict(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    if metrics is None:
+        metrics = FontMetrics.from_ttf(path)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(metrics.to_dict(), f, separators=(',', ':'))
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass  # A read-only cache only costs the parse next time
+    _metrics[digest] = metrics
+    return metrics
+
+
+def _glyph_contours(glyf, glyph_pos, glyph):
+    """Contours of a glyph from the raw 'glyf' table; composite glyphs are resolved."""
+    start, end = glyph_pos[glyph], glyph_pos[glyph + 1]
+    if end <= start:
+        return []  # e.g. space
+    count = struct.unpack_from('>h', glyf, start)[0]
+    if count >= 0:
+        return _simple_glyph(glyf, start + 10, count)
+
+    # Composite glyph: a list of transformed component glyphs
+    contours = []
+    offset = start + 10
+    flags = MORE_COMPONENTS
+    while flags & MORE_COMPONENTS:
+        flags, component = struct.unpack_from('>HH', glyf, offset)
+        offset += 4
+        if flags & ARG_1_AND_2_ARE_WORDS:
+            dx, dy = struct.unpack_from('>hh', glyf, offset)
+            offset += 4
+        else:
+            dx, dy = struct.unpack_from('>bb', glyf, offset)
+            offset += 2
+        if not flags & ARGS_ARE_XY_VALUES:
+            dx = dy = 0  # point matching is not used by the dial fonts
+        a, b, c, d = 1.0, 0.0, 0.0, 1.0
+        if flags & WE_HAVE_A_SCALE:
+            a = d = struct.unpack_from('>h', glyf, offset)[0] / 16384
+            offset += 2
+        elif flags & WE_HAVE_AN_X_AND_Y_SCALE:
+            a, d = (v / 16384 for v in struct.unpack_from('>hh', glyf, offset))
+            offset += 4
+        elif flags & WE_HAVE_A_TWO_BY_TWO:
+            a, b, c, d = (v / 16384 for v in struct.unpack_from('>hhhh', glyf, offset))
+            offset += 8
+        for contour in _glyph_contours(glyf, glyph_pos, component):
+            contours.append([(a * x + c * y + dx, b * x + d * y + dy, on) for x, y, on in contour])
+    return contours
+
+
+def _simple_glyph(data, offset, count):
+    """Parse the points of a simple TrueType glyph."""
+    end_points = struct.unpack_from(f'>{count}H', data, offset)
+    offset += 2 * count
+    point_count = end_points[-1] + 1 if count else 0
+    instruction_length = struct.unpack_from('>H', data, offset)[0]
+    offset += 2 + instruction_length
+
+    flags = []
+    while len(flags) < point_count:
+        flag = data[offset]
+        offset += 1
+        repeat = 0
+        if flag & 0x08:
+            repeat = data[offset]
+            offset += 1
+        flags.extend([flag] * (repeat + 1))
+
+    def coordinates(short_flag, same_flag):
+        nonlocal offset
+        values = []
+        value = 0
+        for flag in flags:
+            if flag & short_flag:
+                delta = data[offset]
+                offset += 1
+                value += delta if flag & same_flag else -delta
+            elif not flag & same_flag:
+                value += struct.unpack_from('>h', data, offset)[0]
+                offset += 2
+            values.append(value)
+        return values
+
+    xs = coordinates(0x02, 0x10)
+    ys = coordinates(0x04, 0x20)
+    contours = []
+    first = 0
+    for last in end_points:
+        contours.append([(xs[i], ys[i], bool(flags[i] & 0x01)) for i in range(first, last + 1)])
+        first = last + 1
+    return contours
@@ -0,0 +1,229 @@
+"""
+Tick geometry for the dial scale.
+
+All ticks of a scale are computed in one batched NumPy pass and kept in a TickTable:
+temperatures, physical angles, unit direction vectors and a tick kind per tick. The
+drawing code only turns these arrays into segment coordinates for a given radius.
+
+Ticks are addressed by an integer step index from the first calibration point, so the
+major / middle-minor / minor classification is done with integer arithmetic instead of
+float '%' checks against accumulated temperatures.
+"""
+import math
+
+import numpy as np
+
+from .calibration import Calibration
+
+# Tick kinds stored in TickTable.kind
+MINOR = 0
+MIDDLE_MINOR = 1
+MAJOR = 2
+
+# Largest number of decimals considered when scaling temperatures to integer units
+MAX_DECIMALS = 6
+
+
+class TickTable:
+    """
+    Array-backed table of every tick on a scale, sorted by temperature.
+
+    Attributes:
+        temps (ndarray): Temperature of each tick.
+        angles (ndarray): Physical angle of each tick in degrees.
+        cos, sin (ndarray): Direction of each tick on the canvas (angle measured clockwise).
+        kind (ndarray): MINOR, MIDDLE_MINOR or MAJOR for each tick.
+    """
+    __slots__ = ('temps', 'angles', 'cos', 'sin', 'kind')
+
+    def __init__(self, temps, angles, kind):
+        self.temps = temps
+        self.angles = angles
+        self.kind = kind
+        rad_angles = np.radians(360 - angles)
+        self.cos = np.cos(rad_angles)
+        self.sin = np.sin(rad_angles)
+
+    def __len__(self):
+        return len(self.temps)
+
+    @classmethod
+    def concatenate(cls, tables):
+        """One table holding the ticks of several consecutive tables."""
+        table = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(table, name, np.concatenate([getattr(t, name) for t in tables]))
+        return table
+
+    def subset(self, mask):
+        """Table of the selected ticks, without recomputing their directions."""
+        table = TickTable.__new__(TickTable)
+        for name in self.__slots__:
+            setattr(table, name, getattr(self, name)[mask])
+        return table
+
+    def mask(self, *kinds):
+        """Boolean mask selecting the ticks of the given kinds."""
+        return np.isin(self.kind, kinds)
+
+    def segments(self, center_x, center_y, inner_radius, outer_radius, mask=None):
+        """
+        Start and end coordinates of radial segments for the selected ticks.
+
+        Parameters:
+            center_x, center_y (float): Coordinates of the dial center.
+            inner_radius, outer_radius (float or ndarray): Segment start and end radius.
+                Arrays must match the number of selected ticks.
+            mask (ndarray or None): Ticks to include (default: all).
+
+        Returns:
+            tuple: (x_start, y_start, x_end, y_end) arrays.
+        """
+        cos = self.cos if mask is None else self.cos[mask]
+        sin = self.sin if mask is None else self.sin[mask]
+        return (center_x + inner_radius * cos, center_y + inner_radius * sin,
+                center_x + outer_radius * cos, center_y + outer_radius * sin)
+
+
+def even_major_tick_positions(temperature_start, temperature_end, angle_start, angle_end,
+                              scale_division, physical_start_angle):
+    """
+    Distribute major ticks evenly over the angle range.
+
+    Returns:
+        dict: {temp: physical_angle} for every major tick.
+    """
+    major_tick_positions = {}
+    total_steps = int((temperature_end - temperature_start) / scale_division)
+    for i in range(total_steps + 1):
+        temp = temperature_start + i * scale_division
+        angle_offset = ((temp - temperature_start) / (temperature_end - temperature_start)) * (angle_end - angle_start) + angle_start
+        major_tick_positions[temp] = physical_start_angle + angle_offset
+    return major_tick_positions
+
+
+def integer_scale(*values):
+    """
+    Smallest power of ten that turns all values into (near) integers.
+
+    Values with more than MAX_DECIMALS significant decimals are rounded at that precision.
+    """
+    for decimals in range(MAX_DECIMALS + 1):
+        factor = 10 ** decimals
+        if all(abs(v * factor - round(v * factor)) < 1e-6 for v in values):
+            return factor
+    return 10 ** MAX_DECIMALS
+
+
+class TickScale:
+    """
+    The integer tick lattice of a scale, from which ticks can be computed in any range.
+
+    Ticks are computed on demand, either all at once (table) or in fixed-size chunks
+    (chunks) so that arbitrarily fine scales can be drawn with bounded memory. Any range
+    yields exactly the values the full table has for those ticks.
+
+    Parameters:
+        major_tick_positions (dict): {temp: physical_angle} calibration points.
+        scale_division (float): Temperature difference between major ticks.
+        minor_tick_division (float): Temperature increment between minor ticks.
+        interpolation (str): How angles between calibration points are computed, 'linear' or
+            'pchip' (see calibration.Calibration).
+    """
+
+    def __init__(self, major_tick_positions, scale_division, minor_tick_division, interpolation='linear'):
+        if not major_tick_positions:
+            raise ValueError("At least one major tick position is required")
+        if minor_tick_division <= 0 or scale_division <= 0:
+            raise ValueError("Tick divisions must be positive")
+
+        self.calibration = Calibration(sorted(major_tick_positions),
+                                       [major_tick_positions[t] for t in sorted(major_tick_positions)],
+                                       interpolation)
+        cal_temps = self.calibration.temps
+
+        # Express everything in integer units so classification is exact
+        half_division = scale_division / 2
+        self.factor = integer_scale(cal_temps[0], minor_tick_division, half_division)
+        self.first = round(cal_temps[0] * self.factor)
+        self.step = round(minor_tick_division * self.factor)
+        self.half = round(half_division * self.factor)
+        self.count = int(math.floor((cal_temps[-1] * self.factor - self.first) / self.step + 1e-9)) + 1
+
+    def table(self, start=0, stop=None):
+        """TickTable of the ticks with step index start <= i < stop (default: all ticks)."""
+        if stop is None or stop > self.count:
+            stop = self.count
+        units = self.first + np.arange(start, stop, dtype=np.int64) * self.step
+        kind = np.full(len(units), MINOR, dtype=np.uint8)
+        kind[units % self.half == 0] = MIDDLE_MINOR
+        kind[units % (2 * self.half) == 0] = MAJOR
+
+        temps = units / self.factor
+        return TickTable(temps, self.angles(temps), kind)
+
+    def angles(self, values):
+        """Physical angles of scale values."""
+        return self.calibration(values)
+
+    def chunks(self, chunk_size):
+        """Yield the whole scale as consecutive TickTables of at most chunk_size ticks."""
+        for start in range(0, self.count, chunk_size):
+            yield self.table(start, start + chunk_size)
+
+
+class RingScale(TickScale):
+    """
+    The tick lattice of an extra scale ring in another unit, sharing the calibration of a dial.
+
+    A ring value v sits at the angle the dial has at temperature (v - unit_offset) / unit_scale,
+    so the ring covers the same arc as the dial and all rings are evaluated against one
+    angle table. The ring's ticks fall on whole multiples of its own minor division.
+
+    Parameters:
+        primary (TickScale): Scale of the dial whose calibration is shared.
+        unit_scale (float): Ring units per dial unit (non-zero; negative runs the ring backwards).
+        unit_offset (float): Ring value at dial temperature 0.
+        scale_division (float): Ring value difference between major ticks.
+        minor_tick_division (float): Ring value increment between minor ticks.
+    """
+
+    def __init__(self, primary, unit_scale, unit_offset, scale_division, minor_tick_division):
+        if unit_scale == 0:
+            raise ValueError("unit_scale must not be 0")
+        if minor_tick_division <= 0 or scale_division <= 0:
+            raise ValueError("Tick divisions must be positive")
+
+        self.calibration = primary.calibration
+        self.unit_scale = unit_scale
+        self.unit_offset = unit_offset
+        ends = self.calibration.temps[[0, -1]] * unit_scale + unit_offset
+        low, high = min(ends), max(ends)
+
+        half_division = scale_division / 2
+        self.factor = integer_scale(minor_tick_division, half_division)
+        self.step = round(minor_tick_division * self.factor)
+        self.half = round(half_division * self.factor)
+        # The small tolerances keep end points that are on the lattice despite float conversion
+        self.first = int(math.ceil(low * self.factor / self.step - 1e-9)) * self.step
+        self.count = max(0, int(math.floor((high * self.factor - self.first) / self.step + 1e-9)) + 1)
+
+    def angles(self, values):
+        return self.calibration((values - self.unit_offset) / self.unit_scale)
+
+
+def compute_tick_table(major_tick_positions, scale_division, minor_tick_division, interpolation='linear'):
+    """
+    Compute every tick between the first and last calibration point in one pass.
+
+    Parameters:
+        major_tick_positions (dict): {temp: physical_angle} calibration points.
+        scale_division (float): Temperature difference between major ticks.
+        minor_tick_division (float): Temperature increment between minor ticks.
+        interpolation (str): How angles between calibration points are computed, 'linear' or
+            'pchip' (see calibration.Calibration).
+
+    Returns:
+        TickTable: All ticks, sorted by temperature.
+    """
+    return TickScale(major_tick_positions, scale_division, minor_tick_division, interpolation).table()
@@ -0,0 +1,192 @@
+"""
+Sheet imposition: many dials on shared print sheets in one PDF.
+
+Dials are packed onto A4, A3 or SRA3 sheets with a shelf heuristic (largest dial
+first, each dial goes on the first shelf of any sheet with room left, new shelves and
+sheets are opened as needed). Both sheet orientations are tried and the one needing
+fewer sheets is used.
+
+Everything is drawn on a single canvas, so the font is embedded once for the whole
+document. A dial that occurs more than once is recorded as a form XObject the first
+time and every further copy only references it.
+
+Usage:
+    python -m src.imposition manifest.csv -o sheets.pdf --sheet A3 --gap 3
+"""
+import argparse
+import sys
+from collections import Counter
+
+from reportlab.lib.pagesizes import A3, A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from .batch import job_from_row, read_manifest
+from .dialgenerator import draw_dial_face
+
+SHEET_SIZES = {
+    'A4': A4,
+    'A3': A3,
+    'SRA3': (320 * mm, 450 * mm),
+}
+
+
+def pack_dials(diameters, sheet_size, margin, gap):
+    """
+    Pack circles of the given diameters onto as few sheets as possible.
+
+    Parameters:
+        diameters (list): Diameter of each dial in points.
+        sheet_size (tuple): Sheet width and height in points.
+        margin (float): Unprinted border around the sheet in points.
+        gap (float): Minimum distance between two dials in points.
+
+    Returns:
+        list: One (sheet_index, center_x, center_y) per dial, in input order.
+
+    Raises:
+        ValueError: If a dial does not fit on an empty sheet.
+    """
+    usable_width = sheet_size[0] - 2 * margin
+    usable_height = sheet_size[1] - 2 * margin
+    placements = [None] * len(diameters)
+    # Per sheet: used height and a list of shelves [top offset, height, used width]
+    sheets = []
+
+    for index in sorted(range(len(diameters)), key=lambda i: -diameters[i]):
+        size = diameters[index]
+        if size > usable_width or size > usable_height:
+            raise ValueError(f"A dial of {size / mm:.1f} mm does not fit on a "
+                             f"{sheet_size[0] / mm:.0f} x {sheet_size[1] / mm:.0f} mm sheet")
+        spot = None
+        for sheet_index, sheet in enumerate(sheets):
+            for shelf in sheet['shelves']:
+                if size <= shelf[1] and shelf[2] + size <= usable_width:
+                    spot = sheet_index, shelf
+                    break
+            if spot is None and sheet['height'] + size <= usable_height:
+                shelf = [sheet['height'], size, 0.0]
+                sheet['shelves'].append(shelf)
+                sheet['height'] += size + gap
+                spot = sheet_index, shelf
+            if spot is not None:
+                break
+        if spot is None:
+            shelf = [0.0, size, 0.0]
+            sheets.append({'shelves': [shelf], 'height': size + gap})
+            spot = len(sheets) - 1, shelf
+
+        sheet_index, shelf = spot
+        center_x = margin + shelf[2] + size / 2
+        # Shelves are filled from the top of the sheet; dials are centred vertically on their shelf
+        center_y = sheet_size[1] - margin - shelf[0] - shelf[1] / 2
+        shelf[2] += size + gap
+        placements[index] = (sheet_index, center_x, center_y)
+
+    return placements
+
+
+def plan_sheets(specs, sheet='A4', margin_mm=10.0, gap_mm=3.0):
+    """
+    Choose the sheet orientation and position of every dial.
+
+    Parameters:
+        specs (list): DialSpecs to place.
+        sheet (str or tuple): Name in SHEET_SIZES, or (width, height) in points.
+        margin_mm (float): Unprinted border around each sheet.
+        gap_mm (float): Minimum distance between two dials.
+
+    Returns:
+        tuple: (sheet_size, placements) with placements as returned by pack_dials.
+    """
+    portrait = SHEET_SIZES[sheet] if isinstance(sheet, str) else tuple(sheet)
+    diameters = [spec.outer_radius_mm() * 2 * mm for spec in specs]
+    best = None
+    error = None
+    for sheet_size in (portrait, (portrait[1], portrait[0])):
+        try:
+            placements = pack_dials(diameters, sheet_size, margin_mm * mm, gap_mm * mm)
+        except ValueError as e:
+            error = error or e
+            continue
+        sheet_count = max((p[0] for p in placements), default=-1) + 1
+        if best is None or sheet_count < best[0]:
+            best = sheet_count, sheet_size, placements
+    if best is None:
+        raise error
+    return best[1], best[2]
+
+
+def impose(specs, output, sheet='A4', margin_mm=10.0, gap_mm=3.0, batch_paths=True):
+    """
+    Render dials onto shared sheets in one multi-page PDF.
+
+    Parameters:
+        specs (list): DialSpecs to place; filenames are ignored.
+        output (str or file): Output filename, or a writable binary file object.
+        sheet (str or tuple): Name in SHEET_SIZES, or (width, height) in points.
+        margin_mm (float): Unprinted border around each sheet.
+        gap_mm (float): Minimum distance between two dials.
+        batch_paths (bool): See draw_thermometer_dial.
+
+    Returns:
+        dict: 'sheets' (number of pages), 'dials' and 'forms' (distinct dials drawn as form XObjects).
+    """
+    sheet_size, placements = plan_sheets(specs, sheet, margin_mm, gap_mm)
+    c = canvas.Canvas(output, pagesize=sheet_size)
+
+    repeats = Counter(spec.render_key() for spec in specs)
+    forms = {}
+    by_sheet = {}
+    for spec, (sheet_index, center_x, center_y) in zip(specs, placements):
+        by_sheet.setdefault(sheet_index, []).append((spec, center_x, center_y))
+
+    for sheet_index in sorted(by_sheet):
+        for spec, center_x, center_y in by_sheet[sheet_index]:
+            key = spec.render_key()
+            if repeats[key] == 1:
+                draw_dial_face(c, spec, center_x, center_y, batch_paths)
+                continue
+            radius = spec.outer_radius_mm() * mm
+            if key not in forms:
+                forms[key] = f"dial{len(forms)}"
+                c.beginForm(forms[key], 0, 0, 2 * radius, 2 * radius)
+                draw_dial_face(c, spec, radius, radius, batch_paths)
+                c.endForm()
+            c.saveState()
+            c.translate(center_x - radius, center_y - radius)
+            c.doForm(forms[key])
+            c.restoreState()
+        c.showPage()
+
+    c.save()
+    return {'sheets': len(by_sheet), 'dials': len(specs), 'forms': len(forms)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lay out many dials on print sheets in one PDF.")
+    parser.add_argument('manifest', help="Manifest file (.json, .jsonl or .csv), see src.batch")
+    parser.add_argument('-o', '--output', default='sheets.pdf', help="Output PDF")
+    parser.add_argument('--sheet', default='A4', choices=sorted(SHEET_SIZES), help="Sheet size")
+    parser.add_argument('--margin', type=float, default=10.0, help="Sheet margin in mm")
+    parser.add_argument('--gap', type=float, default=3.0, help="Distance between dials in mm")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = [job_from_row(row, index) for index, row in enumerate(read_manifest(args.manifest))]
+    except (OSError, ValueError) as e:
+        print(f"Could not read manifest '{args.manifest}': {e}", file=sys.stderr)
+        return 2
+
+    try:
+        summary = impose(specs, args.output, args.sheet, args.margin, args.gap)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Placed {summary['dials']} dials on {summary['sheets']} {args.sheet} sheets "
+          f"({summary['forms']} reused dial faces) in {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
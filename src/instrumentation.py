@@ -0,0 +1,127 @@
+"""
+Opt-in instrumentation of the render pipeline.
+
+Pass a RenderMetrics to read_config / draw_thermometer_dial / render_to_bytes to record
+wall time and allocations per phase, plus counters for ticks, labels and bytes written.
+When the render is done, every registered hook is called with the metrics as a plain
+dict, so they can be forwarded to any metrics system. json_log_hook writes them as a
+single structured JSON log line.
+
+Example:
+    metrics = RenderMetrics(hooks=[json_log_hook()])
+    spec = read_config(config_file_path, metrics=metrics)
+    draw_thermometer_dial(spec, metrics=metrics)
+"""
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+
+class RenderMetrics:
+    """
+    Per-phase timings and counters of one render.
+
+    Parameters:
+        hooks (iterable): Callables invoked as hook(record) when the render finishes, where
+            record is the dict returned by to_dict().
+        trace_memory (bool): Also record the peak traced memory per phase. This uses tracemalloc,
+            which slows rendering down considerably.
+    """
+
+    def __init__(self, hooks=(), trace_memory=False):
+        self.hooks = list(hooks)
+        self.trace_memory = trace_memory
+        self.phases = []
+        self.counters = {}
+        self.labels = {}
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase 'name'."""
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {
+                'phase': name,
+                'seconds': time.perf_counter() - start,
+                'allocated_blocks': sys.getallocatedblocks() - blocks,
+            }
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            self.phases.append(record)
+
+    def count(self, name, value):
+        """Add value to counter 'name' (ticks, labels, bytes, ...)."""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def label(self, **labels):
+        """Attach identifying values (e.g. the output filename) to the record."""
+        self.labels.update(labels)
+
+    def seconds(self, name):
+        """Total seconds spent in phase 'name'."""
+        return sum(p['seconds'] for p in self.phases if p['phase'] == name)
+
+    def to_dict(self):
+        return {
+            **self.labels,
+            'total_seconds': sum(p['seconds'] for p in self.phases),
+            'phases': list(self.phases),
+            'counters': dict(self.counters),
+        }
+
+    def json_line(self):
+        """The metrics as one line of JSON."""
+        return json.dumps(self.to_dict(), separators=(',', ':'))
+
+    def finish(self):
+        """Called by the renderer when the dial is written; runs the hooks."""
+        record = self.to_dict()
+        for hook in self.hooks:
+            hook(record)
+        return record
+
+
+class NullMetrics:
+    """Stand-in used when no instrumentation is requested; every call is a no-op."""
+
+    def phase(self, name):
+        return nullcontext()
+
+    def count(self, name, value):
+        pass
+
+    def label(self, **labels):
+        pass
+
+    def finish(self):
+        return None
+
+
+NULL_METRICS = NullMetrics()
+
+
+def json_log_hook(stream=None):
+    """
+    Hook that writes each finished render as one JSON line.
+
+    Parameters:
+        stream (file or None): Where to write (default: sys.stderr at call time).
+    """
+    def hook(record):
+        out = stream if stream is not None else sys.stderr
+        out.write(json.dumps({'event': 'dial_rendered', **record}, separators=(',', ':')) + '\n')
+        out.flush()
+    return hook
@@ -0,0 +1,429 @@
+"""
+Label layout: find scale labels that collide, and fit them so they do not.
+
+The bounding box of every label is computed from the font metrics, exactly where
+draw_labels puts the text. Boxes are checked against each other and against the tick
+strokes (segments widened by half their line width), with a small clearance. Boxes and
+tick segments are bucketed by their centre in a uniform grid whose cells are at least
+as large as the largest object, so an object only needs testing against the objects in
+the 3 x 3 cells around its own; the tests themselves run vectorized over all candidate
+pairs. Ticks that start outside the farthest label corner are never looked at. Extra
+scale rings are checked too, against each other and against the main scale.
+
+fit_labels resolves collisions in up to three steps, each a bisection for the smallest
+change that removes them:
+    offset  move the labels inward, away from the ticks they touch
+    shrink  reduce the font size, down to min_font_size
+    thin    label only every n-th major tick (the label_step setting)
+After thinning, the font size is bisected back up, since fewer labels may fit at a
+larger size again. Only the labels of the main scale are fitted; collisions that do not
+involve them (e.g. between two rings) are reported but left alone.
+
+Usage:
+    python -m src.layout                  report the collisions of config.ini
+    python -m src.layout --fit --write    fit the labels and save the result to config.ini
+"""
+import argparse
+import math
+import sys
+from functools import lru_cache
+
+import numpy as np
+from reportlab.lib.units import mm
+
+from .dialgenerator import config_file_path, label_mask, resolve_major_tick_positions, ring_tick_tables
+from .fonts import BUNDLED_FONTS, font_metrics, label_width
+from .geometry import MAJOR, MIDDLE_MINOR, MINOR, compute_tick_table
+from .spec import DialSpec
+
+STRATEGIES = ('offset', 'shrink', 'thin')
+
+DEFAULT_CLEARANCE_MM = 0.2
+
+# Lower bounds of the fit, relative to the configured values
+MIN_FONT_SCALE = 0.6
+MIN_RADIUS_SCALE = 0.5
+
+# Precision of the text radius bisection
+RADIUS_TOLERANCE_MM = 0.1
+
+# Vertical extent of digits in em, for fonts without bundled outlines
+DEFAULT_FIGURE_EXTENT = (0.0, 0.72)
+
+
+@lru_cache(maxsize=None)
+def figure_extent(font_family):
+    """Bottom and top of the digits and the minus sign in em, relative to the baseline."""
+    if font_family not in BUNDLED_FONTS:
+        return DEFAULT_FIGURE_EXTENT
+    glyphs = font_metrics(font_family)
+    ys = [y for char in '-0123456789' for contour in glyphs.contours(char) for _, y, _ in contour]
+    if not ys:
+        return DEFAULT_FIGURE_EXTENT
+    return min(0, min(ys)) / glyphs.units_per_em, max(ys) / glyphs.units_per_em
+
+
+def label_boxes(tick_table, font_family, font_size, text_radius, label_step=1):
+    """
+    Bounding boxes of the labels as draw_labels places them, around a dial center at (0, 0).
+
+    Parameters:
+        tick_table (TickTable): Tick geometry from compute_tick_table.
+        font_family (str): Label font.
+        font_size (float): Label size in points.
+        text_radius (float): scale_text_radius in points.
+        label_step (int): See draw_labels.
+
+    Returns:
+        tuple: (temps, boxes) with boxes an (n, 4) array of x0, y0, x1, y1 in points.
+    """
+    mask = label_mask(tick_table, label_step)
+    x, y, _, _ = tick_table.segments(0, 0, text_radius, text_radius, mask)
+    # Same vertical adjustment of horizontal labels as draw_labels
+    y = y - np.where(np.abs(tick_table.sin[mask]) < 1e-6, font_size * 0.3, 0.0)
+    temps = tick_table.temps[mask]
+    widths = np.array([label_width(str(int(temp)), font_family, font_size) for temp in temps.tolist()])
+    bottom, top = figure_extent(font_family)
+    boxes = np.column_stack([x - widths / 2, y + bottom * font_size, x + widths / 2, y + top * font_size])
+    return temps, boxes
+
+
+def tick_strokes(spec, tick_table, reach):
+    """
+    Tick strokes that may touch a label, around a dial center at (0, 0).
+
+    Parameters:
+        spec (DialSpec): Tick lengths and widths.
+        tick_table (TickTable): Tick geometry from compute_tick_table.
+        reach (float): Distance of the farthest label corner from the center; ticks starting
+            beyond it are skipped.
+
+    Returns:
+        tuple: (x0, y0, x1, y1, half_width, temps) arrays, one entry per stroke. Major ticks give
+            two strokes each, like draw_major_ticks draws them.
+    """
+    radius = spec.dial_radius_mm * mm
+    major_length = spec.major_tick_length_mm * mm
+    strokes = [
+        (MAJOR, radius - major_length, radius - major_length / 2, spec.major_tick_inner_width),
+        (MAJOR, radius - major_length / 2, radius, spec.major_tick_width),
+        (MINOR, radius - spec.minor_tick_length_mm * mm, radius, spec.minor_tick_width),
+        (MIDDLE_MINOR, radius - spec.middle_minor_tick_length_mm * mm, radius, spec.minor_tick_width),
+    ]
+    parts = []
+    for kind, inner, outer, width in strokes:
+        if inner - width / 2 > reach:
+            continue
+        mask = tick_table.mask(kind)
+        if not mask.any():
+            continue
+        parts.append(tick_table.segments(0, 0, inner, outer, mask) +
+                     (np.full(int(np.count_nonzero(mask)), width / 2), tick_table.temps[mask]))
+    if not parts:
+        return None
+    return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+
+class GridIndex:
+    """
+    Uniform grid over a set of points, for finding every point in the 3 x 3 cells around a query.
+
+    Parameters:
+        x, y (ndarray): Point coordinates.
+        cell (float): Cell size. Two objects whose centers are less than one cell apart in x and y
+            are always found; make it at least the size of the largest object.
+    """
+
+    def __init__(self, x, y, cell):
+        self.cell = cell
+        keys = self._keys(np.floor(x / cell).astype(np.int64), np.floor(y / cell).astype(np.int64))
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    @staticmethod
+    def _keys(cx, cy):
+        return (cx + 2 ** 20) * 2 ** 21 + (cy + 2 ** 20)
+
+    def pairs(self, x, y):
+        """
+        Candidate neighbours of query points.
+
+        Returns:
+            tuple: (query index, point index) arrays, one entry per candidate pair.
+        """
+        cx = np.floor(x / self.cell).astype(np.int64)
+        cy = np.floor(y / self.cell).astype(np.int64)
+        queries, points = [], []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                keys = self._keys(cx + dx, cy + dy)
+                start = np.searchsorted(self.keys, keys, 'left')
+                counts = np.searchsorted(self.keys, keys, 'right') - start
+                total = int(counts.sum())
+                if not total:
+                    continue
+                # Expand every query's [start, start + count) range into one flat index array
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                queries.append(np.repeat(np.arange(len(x)), counts))
+                points.append(self.order[np.repeat(start, counts) + offsets])
+        if not queries:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(queries), np.concatenate(points)
+
+
+def segments_hit_boxes(x0, y0, x1, y1, boxes):
+    """Whether each segment intersects the matching axis-aligned box (Liang-Barsky clipping)."""
+    t0 = np.zeros(len(x0))
+    t1 = np.ones(len(x0))
+    miss = np.zeros(len(x0), dtype=bool)
+    dx, dy = x1 - x0, y1 - y0
+    for p, q in ((-dx, x0 - boxes[:, 0]), (dx, boxes[:, 2] - x0), (-dy, y0 - boxes[:, 1]), (dy, boxes[:, 3] - y0)):
+        parallel = p == 0
+        miss |= parallel & (q < 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = q / p
+        t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+        t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+    return ~miss & (t0 <= t1)
+
+
+def _tick_table(spec):
+    return compute_tick_table(resolve_major_tick_positions(spec), spec.major_tick_division,
+                              spec.minor_tick_division, spec.interpolation)
+
+
+def _ring_scales(spec):
+    """(ring name, ring spec, TickTable) of every extra scale ring of a dial."""
+    names = [dict(ring)['name'] for ring in spec.rings or ()]
+    return [(name, ring, table) for name, (ring, table) in zip(names, ring_tick_tables(spec))]
+
+
+def find_collisions(spec, tick_table=None, clearance_mm=DEFAULT_CLEARANCE_MM, rings=None):
+    """
+    Find labels that overlap other labels or tick strokes, on the main scale and the extra rings.
+
+    Parameters:
+        spec (DialSpec): The dial.
+        tick_table (TickTable or None): Its tick geometry, computed if None.
+        clearance_mm (float): Minimum gap between a label and anything else.
+        rings (list or None): The rings as returned by _ring_scales, computed if None.
+
+    Returns:
+        list: Sorted (kind, label value, other value, label ring, other ring) tuples, kind being
+            'label' for two overlapping labels or 'tick' for a label touching the tick at the other
+            value. The rings are named by their ring name, or '' for the main scale.
+    """
+    if tick_table is None:
+        tick_table = _tick_table(spec)
+    if rings is None:
+        rings = _ring_scales(spec)
+    clearance = clearance_mm * mm
+    scales = [('', spec, tick_table)] + list(rings)
+    labelled = [(name,) + label_boxes(table, scale.font_family, scale.font_size, scale.scale_text_radius_mm * mm,
+                                      scale.label_step) for name, scale, table in scales]
+    temps = np.concatenate([temps for _, temps, _ in labelled])
+    if not len(temps):
+        return []
+    boxes = np.concatenate([boxes for _, temps, boxes in labelled if len(temps)])
+    names = np.array([name for name, temps, _ in labelled for _ in range(len(temps))], dtype=object)
+    center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+    center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+    reach = float(np.max(np.hypot(np.maximum(np.abs(boxes[:, 0]), np.abs(boxes[:, 2])),
+                                  np.maximum(np.abs(boxes[:, 1]), np.abs(boxes[:, 3]))))) + clearance
+    strokes = []
+    for name, scale, table in scales:
+        found = tick_strokes(scale, table, reach)
+        if found is not None:
+            strokes.append(found + (np.full(len(found[0]), name, dtype=object),))
+    strokes = tuple(np.concatenate(arrays) for arrays in zip(*strokes)) if strokes else None
+
+    cell = float(np.max(boxes[:, 2:] - boxes[:, :2]))
+    if strokes is not None:
+        x0, y0, x1, y1, half_width, stroke_temps, stroke_names = strokes
+        cell = max(cell, float(np.max(np.maximum(np.abs(x1 - x0), np.abs(y1 - y0)) + 2 * half_width)))
+    cell += 2 * clearance
+
+    collisions = set()
+    label, other = GridIndex(center_x, center_y, cell).pairs(center_x, center_y)
+    keep = label < other
+    label, other = label[keep], other[keep]
+    overlap = ((boxes[label, 0] < boxes[other, 2] + clearance) & (boxes[other, 0] < boxes[label, 2] + clearance) &
+               (boxes[label, 1] < boxes[other, 3] + clearance) & (boxes[other, 1] < boxes[label, 3] + clearance))
+    collisions.update(zip(['label'] * int(np.count_nonzero(overlap)), temps[label[overlap]].tolist(),
+                          temps[other[overlap]].tolist(), names[label[overlap]], names[other[overlap]]))
+
+    if strokes is not None:
+        label, stroke = GridIndex((x0 + x1) / 2, (y0 + y1) / 2, cell).pairs(center_x, center_y)
+        padding = (half_width[stroke] + clearance)[:, None] * np.array([-1, -1, 1, 1])
+        hit = segments_hit_boxes(x0[stroke], y0[stroke], x1[stroke], y1[stroke], boxes[label] + padding)
+        collisions.update(zip(['tick'] * int(np.count_nonzero(hit)), temps[label[hit]].tolist(),
+                              stroke_temps[stroke[hit]].tolist(), names[label[hit]], stroke_names[stroke[hit]]))
+    return sorted(collisions)
+
+
+def _bisect(ok, good, bad, tolerance=1):
+    """
+    Bisect between a value for which ok holds and one for which it does not.
+
+    Returns:
+        The value closest to bad (to within tolerance) for which ok holds. With the default
+        tolerance of 1, values are integers.
+    """
+    while abs(bad - good) > tolerance:
+        middle = (good + bad) // 2 if tolerance == 1 else (good + bad) / 2
+        if ok(middle):
+            good = middle
+        else:
+            bad = middle
+    return good
+
+
+def fit_labels(spec, strategies=STRATEGIES, min_font_size=None, min_text_radius_mm=None,
+               clearance_mm=DEFAULT_CLEARANCE_MM):
+    """
+    Change the label settings of a dial as little as possible so no label collides.
+
+    Parameters:
+        spec (DialSpec): The dial.
+        strategies (tuple): Any of 'offset', 'shrink' and 'thin', applied in the given order until
+            nothing collides. Each step starts from the settings left by the previous ones.
+        min_font_size (int or None): Smallest font size to shrink to (default: 60% of font_size).
+        min_text_radius_mm (float or None): Smallest text radius to move labels to (default: half
+            of scale_text_radius_mm).
+        clearance_mm (float): See find_collisions.
+
+    Returns:
+        dict: 'spec' (the fitted DialSpec), 'changes' (one line per changed setting), 'before' and
+            'after' (collisions of the original and the fitted spec, see find_collisions).
+    """
+    unknown = set(strategies) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown fit strategy {', '.join(sorted(unknown))}; use {', '.join(STRATEGIES)}")
+    # Only label settings of the main scale change, so the ticks and the rings are computed once
+    tick_table = _tick_table(spec)
+    rings = _ring_scales(spec)
+
+    def collisions(candidate, kind=None):
+        # Only collisions involving a main scale label can be fitted away
+        found = find_collisions(candidate, tick_table, clearance_mm, rings)
+        return [collision for collision in found if (kind is None or collision[0] == kind) and
+                (collision[3] == '' or collision[0] == 'label' and collision[4] == '')]
+
+    def fits(candidate, **changes):
+        return not collisions(candidate.replace(**changes))
+
+    def offset(fitted):
+        if not collisions(fitted, 'tick'):
+            return fitted
+        lowest = min_text_radius_mm if min_text_radius_mm is not None else spec.scale_text_radius_mm * MIN_RADIUS_SCALE
+
+        def clear_of_ticks(radius):
+            return not collisions(fitted.replace(scale_text_radius_mm=radius), 'tick')
+
+        if lowest < fitted.scale_text_radius_mm and clear_of_ticks(lowest):
+            radius = _bisect(clear_of_ticks, lowest, fitted.scale_text_radius_mm, RADIUS_TOLERANCE_MM)
+            fitted = fitted.replace(scale_text_radius_mm=round(radius, 2))
+        return fitted
+
+    def shrink(fitted):
+        min_size = min_font_size if min_font_size is not None else max(1, math.floor(spec.font_size * MIN_FONT_SCALE))
+        if min_size >= fitted.font_size:
+            return fitted
+        # Without a size that fits, the smallest one still removes the most collisions
+        if fits(fitted, font_size=min_size):
+            return fitted.replace(font_size=_bisect(lambda s: fits(fitted, font_size=s), min_size, fitted.font_size))
+        return fitted.replace(font_size=min_size)
+
+    def thin(fitted):
+        majors = int(np.count_nonzero(tick_table.mask(MAJOR)))
+        if fitted.label_step >= majors:
+            return fitted
+        if fits(fitted, label_step=majors):
+            step = _bisect(lambda n: fits(fitted, label_step=n), majors, fitted.label_step)
+        else:
+            # Thinning cannot clear the ticks; only aim at the overlapping labels
+            step = _bisect(lambda n: not collisions(fitted.replace(label_step=n), 'label'), majors, fitted.label_step)
+        fitted = fitted.replace(label_step=step)
+        if fitted.font_size < spec.font_size and not collisions(fitted):
+            # Labels shrunk by an earlier step may fit at a larger size again now that there are fewer
+            fitted = fitted.replace(font_size=_bisect(lambda s: fits(fitted, font_size=s), fitted.font_size,
+                                                      spec.font_size + 1))
+        return fitted
+
+    steps = {'offset': offset, 'shrink': shrink, 'thin': thin}
+    fitted = spec
+    for name in dict.fromkeys(strategies):
+        if not collisions(fitted):
+            break
+        fitted = steps[name](fitted)
+
+    changes = []
+    if fitted.scale_text_radius_mm != spec.scale_text_radius_mm:
+        changes.append(f"scale_text_radius_mm {spec.scale_text_radius_mm:g} -> {fitted.scale_text_radius_mm:g}")
+    if fitted.font_size != spec.font_size:
+        changes.append(f"font_size {spec.font_size} -> {fitted.font_size}")
+    if fitted.label_step != spec.label_step:
+        changes.append(f"label_step {spec.label_step} -> {fitted.label_step} "
+                       f"(one label per {fitted.label_step} major ticks)")
+    return {'spec': fitted, 'changes': changes, 'before': find_collisions(spec, tick_table, clearance_mm, rings),
+            'after': find_collisions(fitted, tick_table, clearance_mm, rings)}
+
+
+def describe_collisions(collisions, limit=10):
+    """Human readable summary of find_collisions results, listing at most 'limit' of them."""
+    labels = sum(1 for collision in collisions if collision[0] == 'label')
+    lines = [f"{len(collisions)} collisions: {labels} between labels, {len(collisions) - labels} with ticks"]
+    for kind, temp, other, ring, other_ring in collisions[:limit]:
+        value = f"{temp:g}" + (f" ({ring})" if ring else '')
+        other_value = f"{other:g}" + (f" ({other_ring})" if other_ring else '')
+        target = f"label {other_value}" if kind == 'label' else f"the tick at {other_value}"
+        lines.append(f"    label {value} overlaps {target}")
+    if len(collisions) > limit:
+        lines.append(f"    ... and {len(collisions) - limit} more")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the dial labels for collisions and optionally fit them.")
+    parser.add_argument('-c', '--config', default=config_file_path, help="Dial configuration (config.ini)")
+    parser.add_argument('--fit', action='store_true', help="Adjust the label settings until nothing collides")
+    parser.add_argument('--write', action='store_true', help="With --fit, save the fitted settings to the config")
+    parser.add_argument('--strategy', default=','.join(STRATEGIES),
+                        help="Comma separated fit steps, applied in the given order (default: %(default)s)")
+    parser.add_argument('--min-font-size', type=int, default=None, help="Do not shrink labels below this size")
+    parser.add_argument('--min-text-radius', type=float, default=None,
+                        help="Do not move labels inside this radius in mm")
+    parser.add_argument('--clearance', type=float, default=DEFAULT_CLEARANCE_MM,
+                        help="Minimum gap around labels in mm")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = DialSpec.from_ini(args.config)
+        if not args.fit:
+            collisions = find_collisions(spec, clearance_mm=args.clearance)
+            print(describe_collisions(collisions) if collisions else "No label collisions")
+            return 1 if collisions else 0
+        strategies = tuple(name.strip() for name in args.strategy.split(',') if name.strip())
+        result = fit_labels(spec, strategies, args.min_font_size, args.min_text_radius, args.clearance)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if not result['before']:
+        print("No label collisions")
+        return 0
+    print("Before: " + describe_collisions(result['before']))
+    for change in result['changes']:
+        print(f"Changed {change}")
+    if result['after']:
+        print("After: " + describe_collisions(result['after']))
+    else:
+        print("After: no label collisions")
+    if args.write and result['changes']:
+        result['spec'].write_ini(args.config)
+        print(f"Saved to {args.config}")
+    return 1 if result['after'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+File locations shared by the GUI and the command line tools.
+
+Kept free of heavy imports so the GUI can find config.ini before ReportLab and NumPy
+are loaded.
+"""
+import os
+
+script_dir = os.path.dirname(os.path.abspath(__file__))  # directory of the src package
+parent_dir = os.path.dirname(script_dir)  # parent directory of src
+output_dir = os.path.join(parent_dir, 'dials') #output dir for dials
+
+config_file_path = os.path.join(parent_dir, 'config.ini')
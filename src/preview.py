@@ -0,0 +1,185 @@
+"""
+Live dial preview for the Tk GUI.
+
+The preview draws the dial on a tk.Canvas from the same TickTable that
+draw_thermometer_dial renders to PDF. Redraws are debounced, and each canvas layer
+(outline, minor ticks, major ticks, labels, extra scale rings) is only redrawn when one of its inputs
+changed, so e.g. a font size tweak does not recompute or redraw any tick. Ticks and
+labels closer together than MIN_SPACING_PX are thinned out to a regular subset, so a
+very fine scale does not put one canvas item per tick on the Tk main thread.
+
+NumPy and the tick geometry are imported on the first refresh rather than with the
+module, so the GUI window can appear before they are loaded.
+"""
+import tkinter as tk
+
+from .spec import RING_OVERRIDES
+
+POINTS_PER_MM = 72 / 25.4
+
+# Ticks or labels denser than this along the dial are thinned out in the preview
+MIN_SPACING_PX = 1.0
+
+# Settings every layer depends on: the preview is scaled to fit the outermost of these radii
+SCALE_KEYS = ('dial_radius_mm', 'rings')
+
+# Canvas tag -> settings the layer depends on (besides the tick geometry and SCALE_KEYS)
+LAYER_KEYS = {
+    'outline': (),
+    'minor': ('minor_tick_length_mm', 'middle_minor_tick_length_mm', 'minor_tick_width'),
+    'major': ('major_tick_length_mm', 'major_tick_width', 'major_tick_inner_width'),
+    'labels': ('scale_text_radius_mm', 'font_size', 'font_family', 'label_step'),
+    # Rings inherit every setting they do not override
+    'rings': RING_OVERRIDES,
+}
+
+
+class DialPreview:
+    """
+    Canvas widget showing a live preview of the dial.
+
+    Parameters:
+        parent (tk.Widget): Parent widget.
+        read_settings (callable): Returns a DialSpec from the GUI fields, or raises ValueError if a
+            field is invalid.
+        size (int): Width and height of the preview in pixels.
+        delay_ms (int): Debounce delay between the last change and the redraw.
+    """
+
+    def __init__(self, parent, read_settings, size=360, delay_ms=250):
+        self.read_settings = read_settings
+        self.size = size
+        self.delay_ms = delay_ms
+        self.canvas = tk.Canvas(parent, width=size, height=size, background='white', highlightthickness=0)
+        self._pending = None
+        self._geometry_key = None
+        self._tick_table = None
+        self._layer_inputs = {}
+
+    def schedule(self, *_):
+        """Request a redraw; bursts of changes within delay_ms collapse into one."""
+        if self._pending is not None:
+            self.canvas.after_cancel(self._pending)
+        self._pending = self.canvas.after(self.delay_ms, self.refresh)
+
+    def refresh(self):
+        """Redraw the layers whose inputs changed since the last refresh."""
+        self._pending = None
+        self.canvas.delete('status')
+        try:
+            spec = self.read_settings()
+            self._update_geometry(spec)
+        except (ValueError, ZeroDivisionError) as e:
+            self.canvas.create_text(self.size / 2, self.size - 10, text=str(e), fill='red', tags='status')
+            return
+
+        # Scale the dial to fill the preview; every layer depends on it
+        scale = (self.size / 2 - 10) / spec.outer_radius_mm()
+        for tag, keys in LAYER_KEYS.items():
+            inputs = (self._geometry_key, scale) + tuple(getattr(spec, key) for key in SCALE_KEYS + keys)
+            if self._layer_inputs.get(tag) == inputs:
+                continue
+            self._layer_inputs[tag] = inputs
+            self.canvas.delete(tag)
+            getattr(self, '_draw_' + tag)(spec, scale)
+
+    def _update_geometry(self, spec):
+        """Recompute the tick table only if the scale itself changed."""
+        key = spec.geometry_key()
+        if key == self._geometry_key:
+            return
+        from .dialgenerator import resolve_major_tick_positions
+        from .geometry import compute_tick_table
+
+        self._tick_table = compute_tick_table(resolve_major_tick_positions(spec), spec.major_tick_division,
+                                              spec.minor_tick_division, spec.interpolation)
+        self._geometry_key = key
+
+    def _thin(self, table, mask, radius, tag):
+        """
+        Keep every n-th tick of a mask so neighbours are at least MIN_SPACING_PX apart at the given
+        radius in pixels, and note on the canvas that the layer is decimated.
+        """
+        import math
+        import numpy as np
+
+        indices = np.flatnonzero(mask)
+        if len(indices) < 2:
+            return mask
+        arc = radius * math.radians(abs(table.angles[indices[-1]] - table.angles[indices[0]]))
+        spacing = arc / (len(indices) - 1)
+        if spacing >= MIN_SPACING_PX:
+            return mask
+        thinned = np.zeros_like(mask)
+        thinned[indices[::math.ceil(MIN_SPACING_PX / spacing)]] = True
+        self.canvas.create_text(self.size / 2, 10, text="preview decimated", fill='#999999', tags=tag)
+        return thinned
+
+    def _line_width(self, width_pt, scale):
+        return max(1, width_pt / POINTS_PER_MM * scale)
+
+    def _draw_segments(self, segments, width, tag):
+        center = self.size / 2
+        x_start, y_start, x_end, y_end = segments
+        # The PDF y axis points up, the Tk one down
+        for x0, y0, x1, y1 in zip((center + x_start).tolist(), (center - y_start).tolist(),
+                                  (center + x_end).tolist(), (center - y_end).tolist()):
+            self.canvas.create_line(x0, y0, x1, y1, width=width, tags=tag)
+
+    def _draw_outline(self, spec, scale):
+        center = self.size / 2
+        radius = spec.dial_radius_mm * scale
+        self.canvas.create_oval(center - radius, center - radius, center + radius, center + radius,
+                                outline='#cccccc', tags='outline')
+
+    def _draw_minor(self, spec, scale, table=None, tag='minor'):
+        import numpy as np
+        from .geometry import MIDDLE_MINOR, MINOR
+
+        table = self._tick_table if table is None else table
+        radius = spec.dial_radius_mm * scale
+        mask = self._thin(table, table.mask(MINOR, MIDDLE_MINOR), radius, tag)
+        tick_length = np.where(table.kind[mask] == MIDDLE_MINOR, spec.middle_minor_tick_length_mm,
+                               spec.minor_tick_length_mm) * scale
+        self._draw_segments(table.segments(0, 0, radius - tick_length, radius, mask),
+                            self._line_width(spec.minor_tick_width, scale), tag)
+
+    def _draw_major(self, spec, scale, table=None, tag='major'):
+        from .geometry import MAJOR
+
+        table = self._tick_table if table is None else table
+        radius = spec.dial_radius_mm * scale
+        mask = self._thin(table, table.mask(MAJOR), radius, tag)
+        length = spec.major_tick_length_mm * scale
+        self._draw_segments(table.segments(0, 0, radius - length, radius - length / 2, mask),
+                            self._line_width(spec.major_tick_inner_width, scale), tag)
+        self._draw_segments(table.segments(0, 0, radius - length / 2, radius, mask),
+                            self._line_width(spec.major_tick_width, scale), tag)
+
+    def _draw_labels(self, spec, scale, table=None, tag='labels'):
+        import numpy as np
+        from .dialgenerator import label_mask
+
+        table = self._tick_table if table is None else table
+        center = self.size / 2
+        text_radius = spec.scale_text_radius_mm * scale
+        mask = self._thin(table, label_mask(table, spec.label_step), text_radius, tag)
+        font_px = spec.font_size / POINTS_PER_MM * scale
+        x_text, y_text, _, _ = table.segments(center, center, text_radius, text_radius, mask)
+        horizontal = np.abs(table.sin[mask]) < 1e-6
+        for temp, x, y, is_horizontal in zip(table.temps[mask].tolist(), x_text.tolist(),
+                                             (2 * center - y_text).tolist(), horizontal.tolist()):
+            if is_horizontal:
+                # Same vertical adjustment as the PDF labels
+                y += 0.3 * font_px
+            # Anchor at the baseline-ish bottom edge, like drawCentredString
+            self.canvas.create_text(x, y, text=str(int(temp)), anchor='s',
+                                    font=('Helvetica', -max(1, round(font_px))), tags=tag)
+
+    def _draw_rings(self, spec, scale):
+        from .dialgenerator import ring_tick_tables
+
+        for ring, table in ring_tick_tables(spec):
+            self._draw_minor(ring, scale, table, 'rings')
+            self._draw_major(ring, scale, table, 'rings')
+            self._draw_labels(ring, scale, table, 'rings')
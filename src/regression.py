@@ -0,0 +1,297 @@
+"""
+Golden-file regression check: render reference dials and compare them with stored PDFs.
+
+The corpus is the shipped config.ini plus every .ini file in benchmarks/golden/specs.
+Each dial is rendered in reproducible mode (see draw_thermometer_dial), so an unchanged
+renderer gives byte-identical PDFs, and the SHA-256 of each PDF is compared with the one
+recorded in benchmarks/golden/expected/hashes.json. The corpus is rendered in parallel,
+one dial per worker process.
+
+Only when a hash differs is the stored golden PDF opened: the drawing operators of both
+documents are decoded from their content streams and compared, and the report lists
+the changed operators instead of leaving a visual inspection to spot the difference.
+Operators that only differ by float noise below the tolerance are reported as such.
+
+Usage:
+    python -m src.regression                  compare against the golden files
+    python -m src.regression --update         record new golden files after an intended change
+    python -m src.regression --case ring -j 4
+"""
+import argparse
+import base64
+import difflib
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from .paths import config_file_path, parent_dir
+
+golden_dir = os.path.join(parent_dir, 'benchmarks', 'golden')
+specs_dir = os.path.join(golden_dir, 'specs')
+expected_dir = os.path.join(golden_dir, 'expected')
+
+HASHES_FILE = 'hashes.json'
+
+# Operand differences up to this (in points, about 3.5 um) are float noise rather than a change of the drawing
+NUMBER_TOLERANCE = 0.01
+
+OBJECT = re.compile(rb'(\d+) 0 obj\s*(.*?)\s*endobj', re.S)
+CONTENTS = re.compile(rb'/Contents (\d+) 0 R')
+TOKEN = re.compile(rb"""
+    \((?:\\.|[^\\)])*\)           # literal string
+  | <<|>>|\[|\]                   # dictionary and array brackets
+  | <[0-9A-Fa-f\s]*>              # hex string
+  | /[^\s/\[\]()<>{}%]*           # name
+  | [+-]?(?:\d+\.?\d*|\.\d+)      # number
+  | [A-Za-z'"*]+\*?               # operator
+""", re.X)
+NUMBER = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)$')
+
+
+def corpus(case=''):
+    """
+    The reference specs.
+
+    Parameters:
+        case (str): Only keep cases whose name contains this text.
+
+    Returns:
+        dict: Case name -> path of the INI file, sorted by name.
+    """
+    cases = {'config': config_file_path}
+    for path in glob.glob(os.path.join(specs_dir, '*.ini')):
+        cases[os.path.splitext(os.path.basename(path))[0]] = path
+    return {name: cases[name] for name in sorted(cases) if case in name}
+
+
+def render_case(name, path):
+    """
+    Render one reference dial reproducibly. Runs inside a worker process.
+
+    Returns:
+        tuple: (name, PDF bytes or None, error message or None)
+    """
+    from .dialgenerator import read_config, render_to_bytes
+
+    try:
+        return name, render_to_bytes(read_config(path), invariant=True), None
+    except Exception as e:
+        return name, None, f"{type(e).__name__}: {e}"
+
+
+def _decode(header, data):
+    """Undo the /Filter chain of a stream."""
+    filters = re.search(rb'/Filter\s*(\[[^\]]*\]|/\w+)', header)
+    for name in re.findall(rb'/(\w+)', filters.group(1)) if filters else ():
+        if name == b'ASCII85Decode':
+            data = base64.a85decode(data.strip(), adobe=True)
+        elif name == b'FlateDecode':
+            data = zlib.decompress(data)
+        else:
+            raise ValueError(f"Unsupported stream filter {name.decode()}")
+    return data
+
+
+def content_streams(pdf):
+    """
+    Decoded content streams of a PDF written by ReportLab: the pages in order, then form XObjects.
+
+    Parameters:
+        pdf (bytes): The document.
+
+    Returns:
+        list: (label, decoded bytes) per stream.
+    """
+    objects = {int(number): body for number, body in OBJECT.findall(pdf)}
+    pages = [int(number) for number in CONTENTS.findall(pdf)]
+    forms = [number for number, body in sorted(objects.items())
+             if b'/Subtype /Form' in body.partition(b'stream')[0]]
+    streams = []
+    for label, number in ([(f"page {i}", n) for i, n in enumerate(pages, 1)] +
+                          [(f"form object {n}", n) for n in forms]):
+        header, _, data = objects[number].partition(b'stream')
+        length = int(re.search(rb'/Length (\d+)', header).group(1))
+        data = data[2:] if data.startswith(b'\r\n') else data[1:]
+        streams.append((label, _decode(header, data[:length])))
+    return streams
+
+
+def operators(stream):
+    """
+    Split a content stream into drawing operators.
+
+    Returns:
+        list: (operator, operands) tuples; numeric operands are floats, everything else bytes.
+    """
+    result = []
+    operands = []
+    for token in TOKEN.findall(stream):
+        if NUMBER.match(token):
+            operands.append(float(token))
+        elif token[:1].isalpha() or token[:1] in b'\'"':
+            result.append((token.decode('latin-1'), tuple(operands)))
+            operands = []
+        else:
+            operands.append(token)
+    return result
+
+
+def _close(a, b, tolerance):
+    """Two operators that only differ by numbers within the tolerance."""
+    if a[0] != b[0] or len(a[1]) != len(b[1]):
+        return False
+    return all(x == y or (isinstance(x, float) and isinstance(y, float) and abs(x - y) <= tolerance)
+               for x, y in zip(a[1], b[1]))
+
+
+def _format(op):
+    operands = ' '.join(f"{x:.6f}".rstrip('0').rstrip('.') if isinstance(x, float) else x.decode('latin-1') for x in op[1])
+    return f"{operands} {op[0]}".strip()
+
+
+def diff_operators(expected, actual, tolerance=NUMBER_TOLERANCE, limit=20):
+    """
+    Compare the drawing operators of two PDFs.
+
+    Parameters:
+        expected (bytes): Golden PDF.
+        actual (bytes): Freshly rendered PDF.
+        tolerance (float): Numeric operand differences up to this are ignored.
+        limit (int): Maximum number of changed operators to list.
+
+    Returns:
+        list: Report lines describing the differences.
+    """
+    old_streams, new_streams = content_streams(expected), content_streams(actual)
+    if [label for label, _ in old_streams] != [label for label, _ in new_streams]:
+        return [f"content streams differ: {', '.join(label for label, _ in old_streams) or 'none'} -> "
+                f"{', '.join(label for label, _ in new_streams) or 'none'}"]
+
+    lines = []
+    for (label, old), (_, new) in zip(old_streams, new_streams):
+        if old == new:
+            continue
+        old_ops, new_ops = operators(old), operators(new)
+        removed, added, noise = Counter(), Counter(), 0
+        changes = []
+        matcher = difflib.SequenceMatcher(None, old_ops, new_ops, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            if i2 - i1 == j2 - j1 and all(_close(a, b, tolerance) for a, b in zip(old_ops[i1:i2], new_ops[j1:j2])):
+                noise += i2 - i1
+                continue
+            removed.update(op for op, _ in old_ops[i1:i2])
+            added.update(op for op, _ in new_ops[j1:j2])
+            changes.extend(f"    - #{i} {_format(op)}" for i, op in enumerate(old_ops[i1:i2], i1))
+            changes.extend(f"    + #{j} {_format(op)}" for j, op in enumerate(new_ops[j1:j2], j1))
+        if not changes:
+            lines.append(f"{label}: {noise} operators differ by float noise only (<= {tolerance:g})")
+            continue
+        counts = ', '.join(f"{op} -{removed[op]} +{added[op]}" for op in sorted(set(removed) | set(added)))
+        lines.append(f"{label}: {len(old_ops)} -> {len(new_ops)} operators ({counts})")
+        lines.extend(changes[:limit])
+        if len(changes) > limit:
+            lines.append(f"    ... {len(changes) - limit} more")
+    return lines or ["drawing operators are identical; the difference is in fonts or document structure"]
+
+
+def load_hashes(directory=expected_dir):
+    path = os.path.join(directory, HASHES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def run_regression(cases, directory=expected_dir, workers=None, update=False, tolerance=NUMBER_TOLERANCE):
+    """
+    Render the corpus in parallel and compare it with the golden files.
+
+    Parameters:
+        cases (dict): Case name -> INI path, as returned by corpus().
+        directory (str): Directory of the golden PDFs and hashes.json.
+        workers (int or None): Number of worker processes (default: CPU count).
+        update (bool): Store the renders as the new golden files instead of comparing.
+        tolerance (float): See diff_operators.
+
+    Returns:
+        dict: Summary with 'results' {name: (status, [detail lines])}, status being 'ok', 'changed',
+            'new', 'failed' or 'updated', and 'elapsed'.
+    """
+    from .dialgenerator import register_fonts
+
+    start = time.perf_counter()
+    hashes = load_hashes(directory)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=register_fonts) as pool:
+        futures = [pool.submit(render_case, name, path) for name, path in cases.items()]
+        for future in futures:
+            name, pdf, error = future.result()
+            if error is not None:
+                results[name] = ('failed', [error])
+                continue
+            digest = hashlib.sha256(pdf).hexdigest()
+            golden = os.path.join(directory, name + '.pdf')
+            if update:
+                os.makedirs(directory, exist_ok=True)
+                with open(golden, 'wb') as f:
+                    f.write(pdf)
+                hashes[name] = digest
+                results[name] = ('updated', [])
+            elif name not in hashes:
+                results[name] = ('new', ["no golden file; run with --update to record it"])
+            elif hashes[name] == digest:
+                results[name] = ('ok', [])
+            elif not os.path.exists(golden):
+                results[name] = ('changed', [f"hash {hashes[name][:12]} -> {digest[:12]}, golden PDF missing"])
+            else:
+                with open(golden, 'rb') as f:
+                    results[name] = ('changed', diff_operators(f.read(), pdf, tolerance))
+
+    if update:
+        with open(os.path.join(directory, HASHES_FILE), 'w') as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return {'results': results, 'elapsed': time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare reference dials against stored golden PDFs.")
+    parser.add_argument('--case', default='', help="Only run cases whose name contains this text")
+    parser.add_argument('--golden-dir', default=expected_dir, help="Directory of the golden PDFs")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--update', action='store_true', help="Store the current renders as the golden files")
+    parser.add_argument('--tolerance', type=float, default=NUMBER_TOLERANCE,
+                        help="Ignore numeric operand differences up to this in the operator diff")
+    args = parser.parse_args(argv)
+
+    cases = corpus(args.case)
+    if not cases:
+        print(f"No reference specs match '{args.case}'", file=sys.stderr)
+        return 2
+    summary = run_regression(cases, args.golden_dir, args.workers, args.update, args.tolerance)
+
+    statuses = Counter()
+    for name, (status, details) in sorted(summary['results'].items()):
+        statuses[status] += 1
+        print(f"{status.upper():8} {name}", file=sys.stdout if status in ('ok', 'updated') else sys.stderr)
+        for line in details:
+            print(f"    {line}", file=sys.stderr)
+    print(f"{len(cases)} dials in {summary['elapsed']:.2f}s: " +
+          ', '.join(f"{count} {status}" for status, count in sorted(statuses.items())))
+    if args.update:
+        print(f"Golden files written to {args.golden_dir}")
+        return 1 if statuses['failed'] else 0
+    return 0 if statuses['ok'] == len(cases) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Local HTTP render service.
+
+Runs one long-lived renderer instead of a process per dial. Requests are rendered by a
+pool of worker processes that is started (and has the font registered) before the
+server accepts connections. Identical dials are answered from an in-memory render cache.
+
+Endpoints:
+    POST /render   body: a dial spec as JSON (same keys as [DialSettings], plus
+                   major_tick_positions). Responds with the PDF. calibration_file is
+                   rejected; calibration points are passed as major_tick_positions.
+                   Fonts must be bundled or standard PDF fonts.
+    GET  /health   JSON with pool size, renders in flight, pool restarts and cache statistics.
+
+Usage:
+    python -m src.server --port 8080 --workers 4
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .cache import DEFAULT_MAX_BYTES, RenderCache, dial_cache_key
+from .dialgenerator import register_fonts, render_to_bytes
+from .fonts import font_available
+from .spec import DialSpec
+
+MAX_BODY_BYTES = 4 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+def render_spec(spec):
+    """Worker entry point: render a spec to PDF bytes."""
+    return render_to_bytes(spec)
+
+
+def _warm_up():
+    return os.getpid()
+
+
+class RenderService:
+    """
+    Worker pool, concurrency limit and cache shared by all request handler threads.
+
+    A slot stays taken until its render has finished in the pool, even when the request
+    timed out, so abandoned renders still count against max_pending. If a worker dies,
+    the pool is replaced and the requests it took down fail.
+
+    Parameters:
+        workers (int or None): Number of render processes (default: CPU count).
+        max_pending (int): Requests rendered or queued at the same time; more are rejected with 503.
+        timeout (float): Seconds a single render may take before the request fails.
+        cache_size (int): Size bound of the in-memory render cache in bytes (0 disables it).
+    """
+
+    def __init__(self, workers=None, max_pending=32, timeout=60.0, cache_size=DEFAULT_MAX_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.cache = RenderCache(cache_size) if cache_size else None
+        self.in_flight = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self.pool = self._start_pool()
+
+    def _start_pool(self):
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=register_fonts)
+        # Start every worker now so the first requests do not pay for process start-up and font parsing
+        for future in [pool.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def _restart_pool(self, broken):
+        """Replace a pool whose worker died, unless another request already did."""
+        with self._lock:
+            if self.pool is not broken:
+                return
+            self.pool = self._start_pool()
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _finished(self, future):
+        with self._lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def render(self, spec):
+        """
+        Render a spec through the pool.
+
+        Returns:
+            bytes or None: The PDF, or None if max_pending renders are already running.
+        """
+        key = dial_cache_key(spec) if self.cache is not None else None
+        if key is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        if not self.slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            self.in_flight += 1
+            pool = self.pool
+        try:
+            future = pool.submit(render_spec, spec)
+        except BrokenProcessPool:
+            self._finished(None)
+            self._restart_pool(pool)
+            raise
+        # Released when the render is over, not when this request gives up waiting for it
+        future.add_done_callback(self._finished)
+        try:
+            data = future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise
+
+        if key is not None:
+            self.cache.put(key, data)
+        return data
+
+    def health(self):
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'in_flight': self.in_flight,
+            'restarts': self.restarts,
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'DialGenerator'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        self._send_json(200, self.server.service.health())
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._send_json(404, {'error': 'Not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            return
+        if length <= 0 or length > MAX_BODY_BYTES:
+            self._send_json(413 if length > 0 else 411, {'error': 'Missing or oversized request body'})
+            return
+        try:
+            spec = DialSpec.from_json(self.rfile.read(length))
+            fonts = {spec.font_family} | {ring.font_family for ring, _, _ in spec.ring_specs()}
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        unknown = sorted(font for font in fonts if not font_available(font))
+        if unknown:
+            self._send_json(400, {'error': f"Unknown font_family: {', '.join(unknown)}"})
+            return
+
+        try:
+            data = self.server.service.render(spec)
+        except TimeoutError:
+            self._send_json(504, {'error': 'Render timed out'})
+            return
+        except BrokenProcessPool:
+            self._send_json(500, {'error': 'Render worker died; the worker pool was restarted'})
+            return
+        except ValueError as e:
+            # The spec passed validation but cannot be drawn: still the client's settings
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+        if data is None:
+            self._send_json(503, {'error': 'Too many renders in progress'})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Content-Disposition', f'inline; filename="{os.path.basename(spec.filename)}"')
+        self.end_headers()
+        view = memoryview(data)
+        for offset in range(0, len(data), CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + CHUNK_SIZE])
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host='127.0.0.1', port=8080, workers=None, max_pending=32, timeout=60.0, cache_size=DEFAULT_MAX_BYTES):
+    """Start the render service and serve until interrupted."""
+    service = RenderService(workers, max_pending, timeout, cache_size)
+    httpd = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    httpd.service = service
+    print(f"Rendering dials on http://{host}:{httpd.server_port}/render with {service.workers} workers")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dial renders over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of render processes")
+    parser.add_argument('--max-pending', type=int, default=32, help="Renders in progress before requests get 503")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds allowed per render")
+    parser.add_argument('--cache-size', type=float, default=DEFAULT_MAX_BYTES / 2**20,
+                        help="In-memory render cache size in MB (0 disables it)")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.workers, args.max_pending, args.timeout, int(args.cache_size * 2**20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+DialSpec: the complete, validated description of one dial.
+
+A DialSpec is immutable and hashable, so it can be used directly as a cache or
+memoization key and pickled cheaply to worker processes. It can be built from the
+INI config, from JSON or from a plain dict; all of them go through the same
+conversion and validation in DialSpec.from_dict.
+"""
+import configparser
+import json
+import os
+
+# Setting name -> (type, default), in config.ini order
+SETTINGS = {
+    'filename': (str, 'thermometer_dial.pdf'),
+    'dial_radius_mm': (float, 90.0),
+    'temperature_start': (float, 0.0),
+    'temperature_end': (float, 200.0),
+    'angle_start': (float, 0.0),
+    'angle_end': (float, 270.0),
+    'major_tick_division': (float, 10.0),
+    'minor_tick_division': (float, 1.0),
+    'major_tick_length_mm': (float, 10.0),
+    'major_tick_width': (float, 1.0),
+    'major_tick_inner_width': (float, 3.0),
+    'minor_tick_length_mm': (float, 5.0),
+    'minor_tick_width': (float, 0.5),
+    'middle_minor_tick_length_mm': (float, 7.0),
+    'scale_text_radius_mm': (float, 29.0),
+    'font_size': (int, 12),
+    'font_family': (str, 'Helvetica'),
+    'label_step': (int, 1),
+    'interpolation': (str, 'linear'),
+    'calibration_file': (str, ''),
+}
+
+FIELDS = tuple(SETTINGS) + ('major_tick_positions', 'rings')
+
+# Settings of an extra scale ring; its value at a dial temperature t is t * unit_scale + unit_offset
+RING_SETTINGS = {
+    'name': (str, ''),
+    'unit_scale': (float, 1.0),
+    'unit_offset': (float, 0.0),
+}
+
+# Dial settings a ring can set for itself; the ones it leaves out are those of the dial
+RING_OVERRIDES = ('dial_radius_mm', 'major_tick_division', 'minor_tick_division', 'major_tick_length_mm',
+                  'major_tick_width', 'major_tick_inner_width', 'minor_tick_length_mm', 'minor_tick_width',
+                  'middle_minor_tick_length_mm', 'scale_text_radius_mm', 'font_size', 'font_family', 'label_step')
+
+RING_SECTION_PREFIX = 'Ring:'
+
+# Valid values of the interpolation setting, see calibration.Calibration
+INTERPOLATIONS = ('linear', 'pchip')
+
+
+def _convert(key, value):
+    type_, default = SETTINGS[key]
+    if value is None or value == '':
+        return default
+    try:
+        if type_ is int and isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError
+            return int(value)
+        return type_(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {type_.__name__} value for {key}: {value!r}")
+
+
+def parse_major_tick_positions(value):
+    """
+    Normalize major tick positions.
+
+    Parameters:
+        value (dict, list, str or None): {temp: angle}, [(temp, angle), ...] or "temp:angle;temp:angle".
+
+    Returns:
+        tuple or None: ((temp, angle), ...) sorted by temperature, or None if empty.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, dict):
+        pairs = value.items()
+    elif isinstance(value, str):
+        pairs = [item.split(':') for item in value.split(';') if item.strip()]
+    else:
+        pairs = value
+    try:
+        positions = {float(temp): float(angle) for temp, angle in pairs}
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid major tick positions: {value!r}")
+    return tuple(sorted(positions.items())) or None
+
+
+def parse_rings(value):
+    """
+    Normalize the extra scale rings of a dial.
+
+    Parameters:
+        value (list, str or None): One dict per ring, or the same list as a JSON string. Keys are
+            those of RING_SETTINGS and RING_OVERRIDES; empty values count as left out.
+
+    Returns:
+        tuple or None: One tuple of sorted (key, value) pairs per ring, or None if there are none.
+    """
+    if value is None or value == '':
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError(f"Invalid rings: {value!r}")
+    rings = []
+    for index, ring in enumerate(value, 1):
+        if not isinstance(ring, dict):
+            ring = dict(ring)
+        unknown = set(ring) - set(RING_SETTINGS) - set(RING_OVERRIDES)
+        if unknown:
+            raise ValueError(f"Unknown ring setting(s): {', '.join(sorted(unknown))}")
+        settings = {key: default for key, (_, default) in RING_SETTINGS.items()}
+        settings['name'] = f"ring{index}"
+        for key, raw in ring.items():
+            if raw is None or raw == '':
+                continue
+            if key in RING_SETTINGS:
+                type_ = RING_SETTINGS[key][0]
+                try:
+                    settings[key] = type_(raw)
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid {type_.__name__} value for ring {key}: {raw!r}")
+            else:
+                settings[key] = _convert(key, raw)
+        if settings['unit_scale'] == 0:
+            raise ValueError(f"unit_scale of ring '{settings['name']}' must not be 0")
+        rings.append(tuple(sorted(settings.items())))
+    return tuple(rings) or None
+
+
+class DialSpec:
+    """
+    Immutable description of a dial: every [DialSettings] value plus the major tick positions.
+
+    Attributes are named like the config.ini keys. major_tick_positions is a sorted tuple of
+    (temp, angle_offset) pairs, or None to distribute the major ticks evenly. If calibration_file
+    names a CSV file, major_tick_positions are read from it and any positions passed in are ignored.
+    rings holds the extra scale rings (see parse_rings and ring_specs), or None.
+    """
+    __slots__ = FIELDS + ('_hash',)
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown dial setting(s): {', '.join(sorted(unknown))}")
+        for key in SETTINGS:
+            object.__setattr__(self, key, _convert(key, settings.get(key)))
+        positions = settings.get('major_tick_positions')
+        if self.calibration_file:
+            # Imported here: the calibration module pulls in NumPy, which plain specs do not need
+            from .calibration import load_calibration_csv
+            positions = load_calibration_csv(self.calibration_file)
+        object.__setattr__(self, 'major_tick_positions', parse_major_tick_positions(positions))
+        object.__setattr__(self, 'rings', parse_rings(settings.get('rings')))
+        object.__setattr__(self, '_hash', None)
+        self._validate()
+
+    def _validate(self):
+        if self.dial_radius_mm <= 0:
+            raise ValueError("dial_radius_mm must be positive")
+        if self.temperature_end == self.temperature_start:
+            raise ValueError("temperature_start and temperature_end must differ")
+        if self.major_tick_division <= 0 or self.minor_tick_division <= 0:
+            raise ValueError("Tick divisions must be positive")
+        # Evenly distributed major ticks (see even_major_tick_positions) run from start towards end
+        if self.major_tick_positions is None and \
+                int((self.temperature_end - self.temperature_start) / self.major_tick_division) < 0:
+            raise ValueError("temperature_start to temperature_end gives no major ticks; "
+                             "make temperature_end larger or give major_tick_positions")
+        if self.font_size <= 0:
+            raise ValueError("font_size must be positive")
+        if self.label_step < 1:
+            raise ValueError("label_step must be at least 1")
+        if self.interpolation not in INTERPOLATIONS:
+            raise ValueError(f"interpolation must be one of {', '.join(INTERPOLATIONS)}")
+        # Every ring must make a valid dial with the settings it inherits
+        self.ring_specs()
+
+    @classmethod
+    def from_dict(cls, data, strict=True):
+        """
+        Build a spec from a dict of setting name -> value (strings are converted).
+
+        Dicts come from manifests and HTTP requests, so no file is read on their behalf: a
+        calibration_file is rejected, and the calibration points go into major_tick_positions.
+
+        Parameters:
+            data (dict): The settings.
+            strict (bool): Reject unknown keys. False ignores them, e.g. bookkeeping columns
+                (order number, customer) of a manifest.
+        """
+        if str(data.get('calibration_file') or '').strip():
+            raise ValueError("calibration_file is only read from INI files; "
+                             "pass the calibration points as major_tick_positions instead")
+        if not strict:
+            data = {key: value for key, value in data.items() if key in FIELDS}
+        return cls(**data)
+
+    @classmethod
+    def from_json(cls, text):
+        """Build a spec from a JSON object; see from_dict."""
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("A dial spec must be a JSON object")
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_ini(cls, config_file_path):
+        """
+        Build a spec from an INI file with a [DialSettings] and an optional [MajorTickPositions] section,
+        plus one [Ring:<name>] section per extra scale ring, in file order.
+        A relative calibration_file is resolved against the directory of the INI file.
+        """
+        config = configparser.ConfigParser()
+        if not config.read(config_file_path):
+            raise ValueError(f"Configuration file '{config_file_path}' not found.")
+        if 'DialSettings' not in config:
+            raise ValueError(f"No [DialSettings] section in '{config_file_path}'")
+        settings = dict(config['DialSettings'])
+        calibration_file = settings.get('calibration_file', '').strip()
+        if calibration_file and not os.path.isabs(calibration_file):
+            settings['calibration_file'] = os.path.join(os.path.dirname(os.path.abspath(config_file_path)),
+                                                        calibration_file)
+        if 'MajorTickPositions' in config:
+            settings['major_tick_positions'] = dict(config['MajorTickPositions'])
+        rings = [dict(config[section], name=section[len(RING_SECTION_PREFIX):].strip())
+                 for section in config.sections() if section.startswith(RING_SECTION_PREFIX)]
+        if rings:
+            settings['rings'] = rings
+        return cls(**settings)
+
+    def to_dict(self):
+        """Plain dict of all settings; major_tick_positions as {temp: angle} or None, rings as a list of dicts or None."""
+        data = {key: getattr(self, key) for key in SETTINGS}
+        data['major_tick_positions'] = self.positions_dict()
+        data['rings'] = [dict(ring) for ring in self.rings] if self.rings else None
+        return data
+
+    def to_json(self):
+        data = self.to_dict()
+        if data['major_tick_positions'] is not None:
+            data['major_tick_positions'] = [list(pair) for pair in self.major_tick_positions]
+        return json.dumps(data)
+
+    def write_ini(self, config_file_path):
+        """
+        Write the spec as config.ini. Floats are written with repr() so they read back unchanged.
+        Positions loaded from a calibration_file are not copied into [MajorTickPositions].
+        """
+        config = configparser.ConfigParser()
+        config['DialSettings'] = {key: repr(value) if isinstance(value, float) else str(value)
+                                  for key, value in self.to_dict().items() if key in SETTINGS}
+        if self.major_tick_positions and not self.calibration_file:
+            config['MajorTickPositions'] = {repr(temp): repr(angle) for temp, angle in self.major_tick_positions}
+        for ring in self.rings or ():
+            settings = dict(ring)
+            name = settings.pop('name')
+            config[RING_SECTION_PREFIX + name] = {
+                key: repr(value) if isinstance(value, float) else str(value) for key, value in settings.items()}
+        with open(config_file_path, 'w') as f:
+            config.write(f)
+
+    def positions_dict(self):
+        """major_tick_positions as {temp: angle_offset}, or None."""
+        if self.major_tick_positions is None:
+            return None
+        return dict(self.major_tick_positions)
+
+    def replace(self, **changes):
+        """Return a copy with some settings changed."""
+        data = {key: getattr(self, key) for key in FIELDS}
+        data.update(changes)
+        return DialSpec(**data)
+
+    def ring_specs(self):
+        """
+        The extra scale rings, ready to draw.
+
+        Returns:
+            list: (DialSpec, unit_scale, unit_offset) per ring. The spec is the dial with the ring's own
+                settings applied and no rings of its own.
+        """
+        result = []
+        for ring in self.rings or ():
+            settings = dict(ring)
+            name = settings.pop('name')
+            unit_scale = settings.pop('unit_scale')
+            unit_offset = settings.pop('unit_offset')
+            try:
+                result.append((self.replace(rings=None, **settings), unit_scale, unit_offset))
+            except ValueError as e:
+                raise ValueError(f"Ring '{name}': {e}")
+        return result
+
+    def outer_radius_mm(self):
+        """Radius of the outermost scale ring."""
+        return max([self.dial_radius_mm] + [dict(ring).get('dial_radius_mm', 0.0) for ring in self.rings or ()])
+
+    def render_key(self):
+        """Tuple of everything that affects the drawing, i.e. all fields except the filename."""
+        return tuple(getattr(self, key) for key in FIELDS if key != 'filename')
+
+    def geometry_key(self):
+        """Tuple of the fields the tick geometry depends on."""
+        return (self.temperature_start, self.temperature_end, self.angle_start, self.angle_end,
+                self.major_tick_division, self.minor_tick_division, self.major_tick_positions, self.interpolation)
+
+    def _values(self):
+        return tuple(getattr(self, key) for key in FIELDS)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("DialSpec is immutable; use replace()")
+
+    def __delattr__(self, key):
+        raise AttributeError("DialSpec is immutable")
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for key, value in zip(FIELDS, state):
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, '_hash', None)
+
+    def __eq__(self, other):
+        if not isinstance(other, DialSpec):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(self._values()))
+        return self._hash
+
+    def __repr__(self):
+        return 'DialSpec(' + ', '.join(f'{key}={getattr(self, key)!r}' for key in FIELDS) + ')'
@@ -0,0 +1,276 @@
+"""
+Variable-data production runs: one static dial face, many stamped units.
+
+The scale (ticks and labels) is computed, drawn and encoded once (RecordedFace) and
+defined as a form XObject in every output file: once per multi-page file, or in each
+file of a per-unit run. Every unit only adds its own text fields (serial number, customer, order code,
+...) from a row of a data file on top of it. Rows are read lazily and the output is
+split into files of a bounded number of pages, so memory use does not grow with the
+length of the run.
+
+Text fields are given as name:x:y[:size], with x and y in mm relative to the dial
+center and an optional font size in points. Without --field, every column of the data
+file is stamped, stacked below the center.
+
+Usage:
+    python -m src.stamping units.csv -o run.pdf --pages-per-file 500
+    python -m src.stamping units.csv --field serial:0:-15:9 --per-unit "dials/{serial}.pdf"
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from .batch import iter_manifest
+from .dialgenerator import config_file_path, dial_page_size, draw_dial_face, read_config
+from .fonts import ensure_font
+
+FACE_FORM = 'dialface'
+
+
+def parse_field(text):
+    """
+    Parse a text field definition.
+
+    Parameters:
+        text (str): "name:x_mm:y_mm" or "name:x_mm:y_mm:font_size".
+
+    Returns:
+        tuple: (name, x_mm, y_mm, font_size or None)
+    """
+    parts = text.split(':')
+    if len(parts) not in (3, 4) or not parts[0]:
+        raise ValueError(f"Invalid field {text!r}, expected name:x:y[:size]")
+    try:
+        size = float(parts[3]) if len(parts) == 4 else None
+        return parts[0], float(parts[1]), float(parts[2]), size
+    except ValueError:
+        raise ValueError(f"Invalid field {text!r}, expected name:x:y[:size]")
+
+
+def default_fields(spec, names):
+    """Stack the given columns below the dial center, one line each."""
+    size = max(6, round(spec.font_size * 0.7))
+    line = size * 1.4 / mm
+    first = -spec.dial_radius_mm * 0.3
+    return [(name, 0.0, first - i * line, size) for i, name in enumerate(names)]
+
+
+def stamp_fields(c, spec, fields, row, center_x, center_y):
+    """Draw the text fields of one unit."""
+    for name, x_mm, y_mm, size in fields:
+        value = row.get(name)
+        if value is None or value == '':
+            continue
+        ensure_font(spec.font_family)
+        c.setFont(spec.font_family, size or spec.font_size)
+        c.drawCentredString(center_x + x_mm * mm, center_y + y_mm * mm, str(value))
+
+
+class _RecordingCanvas(canvas.Canvas):
+    """A canvas that also notes every font selection and string, in drawing order."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.text_runs = []
+
+    def setFont(self, psfontname, size, leading=None):
+        self.text_runs.append((psfontname, size, ''))
+        super().setFont(psfontname, size, leading)
+
+    def drawString(self, x, y, text, *args, **kwargs):
+        self.text_runs.append((self._fontname, self._fontsize, text))
+        super().drawString(x, y, text, *args, **kwargs)
+
+
+class RecordedFace:
+    """
+    A dial face drawn and encoded once, then defined as a form XObject in any number of documents.
+
+    Serializing the face (Flate and ASCII85 encoding of thousands of tick segments) costs more than
+    drawing it, so the encoded content stream is kept and every document only gets a copy of it.
+    A canvas numbers its fonts and TrueType subset glyphs in the order they are first used, so
+    before the copy is defined the recorded font selections and strings are run through a text
+    object that is never drawn: the document then assigns the same font names and glyph codes the
+    recorded operators refer to.
+
+    Parameters:
+        spec (DialSpec): The dial.
+        page_size (tuple): Page size in points; the face is centered on it.
+        batch_paths (bool): See draw_thermometer_dial.
+    """
+
+    def __init__(self, spec, page_size, batch_paths=True):
+        from reportlab import rl_config
+        from reportlab.pdfbase.pdfdoc import PDFBase85Encode, PDFZCompress, pdfdocEnc
+
+        recorder = _RecordingCanvas(io.BytesIO(), pagesize=page_size)
+        draw_dial_face(recorder, spec, page_size[0] / 2, page_size[1] / 2, batch_paths)
+        self.page_size = page_size
+        self.text_runs = recorder.text_runs
+
+        # The stream endForm would build from ReportLab's operator accumulator, encoded the same way
+        content = pdfdocEnc('\n'.join([recorder._preamble] + recorder._code))
+        self.filters = []
+        if recorder._pageCompression:
+            self.filters = [PDFBase85Encode, PDFZCompress] if rl_config.useA85 else [PDFZCompress]
+        for stream_filter in reversed(self.filters):
+            content = stream_filter.encode(content)
+        self.content = content
+
+    def define_form(self, c, name):
+        """Define the face as the form XObject 'name' in the canvas's document."""
+        from reportlab.pdfbase.pdfdoc import PDFArray, PDFDictionary, PDFName, PDFStream
+
+        text = c.beginText()
+        for font_family, size, run in self.text_runs:
+            text.setFont(font_family, size)
+            if run:
+                text.textOut(run)
+        # With /Filter already set, the stream is written as is instead of being encoded again
+        stream = PDFStream(PDFDictionary({'Filter': PDFArray([PDFName(f.pdfname) for f in self.filters])}),
+                           self.content)
+        c.beginForm(name, 0, 0, self.page_size[0], self.page_size[1])
+        c.endForm(Contents=stream)
+
+
+def _chunk_filename(output, number):
+    root, ext = os.path.splitext(output)
+    return f"{root}_{number:04d}{ext or '.pdf'}"
+
+
+def stamp_pages(spec, rows, output, fields=None, pages_per_file=500, batch_paths=True):
+    """
+    Stamp every row onto its own page, in multi-page PDFs of at most pages_per_file pages.
+
+    Parameters:
+        spec (DialSpec): The static dial.
+        rows (iterable): One dict of field values per unit; consumed lazily.
+        output (str): Output filename. If more than one file is needed, they are numbered
+            (run.pdf -> run_0001.pdf, run_0002.pdf, ...).
+        fields (list or None): (name, x_mm, y_mm, size) tuples; default: every column of the first row.
+        pages_per_file (int): Bounds the pages held in memory before a file is written.
+        batch_paths (bool): See draw_thermometer_dial.
+
+    Returns:
+        dict: 'units' stamped and 'files' written.
+    """
+    page_size = dial_page_size(spec)
+    center_x, center_y = page_size[0] / 2, page_size[1] / 2
+    face = RecordedFace(spec, page_size, batch_paths)
+
+    files = []
+    c = None
+    units = 0
+    pending = None
+    for row in rows:
+        if fields is None:
+            fields = default_fields(spec, list(row))
+        if c is not None and units % pages_per_file == 0:
+            c.save()
+            files.append(pending)
+            c = None
+        if c is None:
+            pending = _chunk_filename(output, len(files) + 1)
+            c = canvas.Canvas(pending, pagesize=page_size)
+            # The face is recorded once per file; every page only references it
+            face.define_form(c, FACE_FORM)
+        c.doForm(FACE_FORM)
+        stamp_fields(c, spec, fields, row, center_x, center_y)
+        c.showPage()
+        units += 1
+
+    if c is not None:
+        c.save()
+        files.append(pending)
+    if len(files) == 1:
+        os.replace(files[0], output)
+        files[0] = output
+    return {'units': units, 'files': files}
+
+
+def stamp_files(spec, rows, filename_template, fields=None, batch_paths=True):
+    """
+    Stamp every row into its own single-page PDF. The face is drawn once and copied into each file.
+
+    Parameters:
+        spec (DialSpec): The static dial.
+        rows (iterable): One dict of field values per unit; consumed lazily.
+        filename_template (str): str.format template for the output path, filled with the row's
+            fields and 'index', e.g. "dials/{serial}.pdf".
+        fields (list or None): See stamp_pages.
+        batch_paths (bool): See draw_thermometer_dial.
+
+    Returns:
+        dict: 'units' stamped and 'files' written.
+    """
+    page_size = dial_page_size(spec)
+    center_x, center_y = page_size[0] / 2, page_size[1] / 2
+    face = RecordedFace(spec, page_size, batch_paths)
+
+    files = []
+    for index, row in enumerate(rows):
+        if fields is None:
+            fields = default_fields(spec, list(row))
+        try:
+            filename = filename_template.format(index=index, **row)
+        except (KeyError, IndexError) as e:
+            raise ValueError(f"Row {index}: filename template needs field {e}")
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        c = canvas.Canvas(filename, pagesize=page_size)
+        face.define_form(c, FACE_FORM)
+        c.doForm(FACE_FORM)
+        stamp_fields(c, spec, fields, row, center_x, center_y)
+        c.showPage()
+        c.save()
+        files.append(filename)
+    return {'units': len(files), 'files': files}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stamp per-unit text onto one static dial face.")
+    parser.add_argument('data', help="Unit data (.csv, .jsonl or .json), one row per unit")
+    parser.add_argument('-c', '--config', default=config_file_path, help="Dial configuration (config.ini)")
+    parser.add_argument('-o', '--output', default='stamped.pdf', help="Output PDF for multi-page runs")
+    parser.add_argument('--pages-per-file', type=int, default=500,
+                        help="Start a new output file after this many pages")
+    parser.add_argument('--per-unit', metavar='TEMPLATE', default=None,
+                        help="Write one PDF per unit instead, named by a template like 'dials/{serial}.pdf'")
+    parser.add_argument('--field', action='append', default=None, metavar='NAME:X:Y[:SIZE]',
+                        help="Text field position in mm from the dial center (repeatable)")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = read_config(args.config)
+        fields = [parse_field(text) for text in args.field] if args.field else None
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.pages_per_file <= 0:
+        print("--pages-per-file must be positive", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    try:
+        rows = iter_manifest(args.data)
+        if args.per_unit:
+            summary = stamp_files(spec, rows, args.per_unit, fields)
+        else:
+            summary = stamp_pages(spec, rows, args.output, fields, args.pages_per_file)
+    except (OSError, ValueError) as e:
+        print(f"Stamping failed: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    rate = summary['units'] / elapsed if elapsed > 0 else 0.0
+    print(f"Stamped {summary['units']} units into {len(summary['files'])} files in {elapsed:.2f}s ({rate:.0f} units/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""
+Startup time: how long the entry points take to import, and which modules cost the most.
+
+Every entry point is imported in a fresh interpreter with python -X importtime, several
+times, and the fastest run is kept. The report lists the total import time and the
+modules with the largest cumulative time (a module's own time plus everything it
+imports). Results are compared against benchmarks/startup.json, like src.benchmark
+does for rendering, so a new heavy import at module level shows up as a regression.
+
+Usage:
+    python -m src.startup                     compare against the baseline
+    python -m src.startup --update-baseline   record a new baseline on this machine
+    python -m src.startup --module main -n 10 --top 25
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .paths import parent_dir
+
+baseline_path = os.path.join(parent_dir, 'benchmarks', 'startup.json')
+
+# Modules imported by the GUI and the command line tools
+ENTRY_POINTS = ('main', 'src.dialgenerator', 'src.batch', 'src.toolpath')
+
+# Differences below this are noise, whatever the relative change
+MIN_TIME_DELTA = 0.010  # seconds
+
+
+def parse_importtime(output):
+    """
+    Parse the -X importtime report.
+
+    Parameters:
+        output (str): stderr of the interpreter.
+
+    Returns:
+        dict: Module name -> (self seconds, cumulative seconds).
+    """
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # the column header
+        modules[fields[2].strip()] = (self_us / 1e6, cumulative_us / 1e6)
+    return modules
+
+
+def measure_imports(module, runs=5, python=sys.executable):
+    """
+    Import a module in fresh interpreters and keep the fastest run.
+
+    Parameters:
+        module (str): Module to import, e.g. 'main'.
+        runs (int): Number of interpreters to start.
+        python (str): Interpreter to use.
+
+    Returns:
+        dict: 'total' seconds to import the module and 'modules' {name: cumulative seconds}
+            of that run.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([python, '-X', 'importtime', '-c', f'import {module}'], cwd=parent_dir,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"'import {module}' failed:\n{result.stderr.strip().splitlines()[-1]}")
+        modules = parse_importtime(result.stderr)
+        if module not in modules:
+            raise RuntimeError(f"No import time reported for '{module}'")
+        total = modules[module][1]
+        if best is None or total < best['total']:
+            best = {'total': total, 'modules': {name: times[1] for name, times in modules.items()}}
+    return best
+
+
+def top_modules(result, count):
+    """The count modules with the largest cumulative import time, slowest first."""
+    return sorted(result['modules'].items(), key=lambda item: -item[1])[:count]
+
+
+def compare(name, result, baseline, tolerance):
+    """
+    Compare the import time of an entry point against its baseline.
+
+    Returns:
+        list: Human readable regressions, empty if it is within tolerance.
+    """
+    old, new = baseline.get('total'), result['total']
+    if old is not None and new > old * (1 + tolerance) and new - old > MIN_TIME_DELTA:
+        # Name the modules that appeared or got slower, so the culprit is obvious
+        grown = [f"{module} {seconds * 1000:.0f} ms" for module, seconds in top_modules(result, 10)
+                 if seconds - baseline.get('modules', {}).get(module, 0.0) > MIN_TIME_DELTA]
+        detail = f" ({', '.join(grown)})" if grown else ''
+        return [f"{name}: import {old * 1000:.0f} ms -> {new * 1000:.0f} ms{detail}"]
+    return []
+
+
+def print_result(name, result, count):
+    print(f"{name}: {result['total'] * 1000:.1f} ms")
+    for module, seconds in top_modules(result, count):
+        if module != name:
+            print(f"    {seconds * 1000:7.1f} ms  {module}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time of the dial generator entry points.")
+    parser.add_argument('--module', action='append', default=None,
+                        help=f"Entry point to measure (repeatable, default: {', '.join(ENTRY_POINTS)})")
+    parser.add_argument('-n', '--runs', type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument('--top', type=int, default=10, help="Number of slowest modules to list")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON")
+    parser.add_argument('--baseline', default=baseline_path, help="Baseline JSON file")
+    parser.add_argument('--update-baseline', action='store_true', help="Store the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help="Allowed relative slowdown before an entry point fails")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = {}
+    regressions = []
+    for name in args.module or ENTRY_POINTS:
+        try:
+            results[name] = measure_imports(name, max(1, args.runs))
+        except RuntimeError as e:
+            print(e, file=sys.stderr)
+            return 2
+        if not args.json:
+            print_result(name, results[name], args.top)
+        if name in baseline:
+            regressions.extend(compare(name, results[name], baseline[name], args.tolerance))
+
+    if args.json:
+        print(json.dumps({name: {'total': result['total'], 'modules': dict(top_modules(result, args.top))}
+                          for name, result in results.items()}, indent=2))
+
+    if args.update_baseline:
+        # Only the slowest modules are kept; they are enough to point at a regression
+        baseline.update({name: {'total': result['total'], 'modules': dict(top_modules(result, 25))}
+                         for name, result in results.items()})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Baseline written to {args.baseline}", file=sys.stderr if args.json else sys.stdout)
+        return 0
+
+    if not baseline:
+        if not args.json:
+            print(f"No baseline at {args.baseline}; run with --update-baseline first.")
+        return 0
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if not args.json:
+        print(f"{len(results)} entry points, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,330 @@
+"""
+Parameter sweeps: render every combination of a few settings and compare them on one sheet.
+
+Each axis names a [DialSettings] key and the values to try, either as a list or as an
+inclusive range:
+
+    font_size=8,10,12
+    scale_text_radius_mm=30:40:2.5     (start:stop:step)
+
+The Cartesian product of all axes is applied to a base spec (config.ini by default).
+Every variant is written as its own PDF by a process pool, and a contact sheet shows
+all variants side by side, labelled with their values.
+
+Variants that only differ in styling (font, tick lengths and widths, text radius, ...)
+share the same tick geometry. They are rendered in groups so the tick table is
+computed once per group and worker instead of once per variant; the contact sheet
+reuses it the same way.
+
+Usage:
+    python -m src.sweep font_size=8:14:2 scale_text_radius_mm=34,36,38 -o sweep --sheet A3
+"""
+import argparse
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from reportlab.lib.units import mm
+
+from .dialgenerator import (config_file_path, draw_dial_face, output_dir, read_config, register_fonts, render_dial,
+                            resolve_major_tick_positions)
+from .geometry import compute_tick_table
+from .imposition import SHEET_SIZES
+from .spec import SETTINGS
+
+CAPTION_FONT = 'Helvetica'
+CAPTION_SIZE = 7
+
+
+def parse_axis(text):
+    """
+    Parse a sweep axis.
+
+    Parameters:
+        text (str): "key=v1,v2,..." or "key=start:stop:step".
+
+    Returns:
+        tuple: (key, [values]); range values are floats, list values are left as strings
+            for DialSpec to convert.
+    """
+    key, sep, values = text.partition('=')
+    key = key.strip()
+    if not sep or not values.strip():
+        raise ValueError(f"Invalid sweep axis {text!r}, expected key=v1,v2,... or key=start:stop:step")
+    if key not in SETTINGS or key == 'filename':
+        raise ValueError(f"Unknown sweep setting '{key}'")
+    if ':' not in values:
+        return key, [value.strip() for value in values.split(',') if value.strip()]
+
+    try:
+        start, stop, step = (float(part) for part in values.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid range in sweep axis {text!r}, expected start:stop:step")
+    if step <= 0 or stop < start:
+        raise ValueError(f"Range in sweep axis {text!r} must have start <= stop and a positive step")
+    # The small tolerance keeps stop in the range despite float steps like 0.1
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return key, [round(start + i * step, 10) for i in range(count)]
+
+
+def sweep_variants(base, axes):
+    """
+    Apply every combination of the axis values to a base spec.
+
+    Parameters:
+        base (DialSpec): Settings shared by all variants.
+        axes (list): (key, values) pairs as returned by parse_axis.
+
+    Returns:
+        tuple: (variants, errors). variants is a list of (index, values, DialSpec) with values
+            a {key: value} dict; errors lists (index, values, message) of invalid combinations.
+    """
+    keys = [key for key, _ in axes]
+    combinations = list(itertools.product(*(values for _, values in axes)))
+    width = len(str(len(combinations)))
+    variants = []
+    errors = []
+    for index, combination in enumerate(combinations, 1):
+        values = dict(zip(keys, combination))
+        try:
+            spec = base.replace(filename=f"sweep_{index:0{width}d}.pdf", **values)
+        except ValueError as e:
+            errors.append((index, values, str(e)))
+            continue
+        variants.append((index, values, spec))
+    return variants, errors
+
+
+def group_by_geometry(variants, workers):
+    """
+    Split variants into render jobs that share one tick table.
+
+    Variants with the same geometry go into the same job; large groups are split into at
+    most 'workers' jobs so a styling-only sweep still uses the whole pool.
+
+    Returns:
+        list: Lists of DialSpecs.
+    """
+    groups = {}
+    for _, _, spec in variants:
+        groups.setdefault(spec.geometry_key(), []).append(spec)
+    jobs = []
+    for specs in groups.values():
+        size = max(1, math.ceil(len(specs) / workers))
+        jobs.extend(specs[i:i + size] for i in range(0, len(specs), size))
+    return jobs
+
+
+def _tick_table(spec):
+    return compute_tick_table(resolve_major_tick_positions(spec), spec.major_tick_division,
+                              spec.minor_tick_division, spec.interpolation)
+
+
+def render_group(specs, target_dir):
+    """
+    Render dials with the same geometry, computing their tick table once. Runs inside a worker process.
+
+    Returns:
+        list: (filename, error message) of every dial that failed.
+    """
+    try:
+        tick_table = _tick_table(specs[0])
+    except Exception as e:
+        return [(spec.filename, f"{type(e).__name__}: {e}") for spec in specs]
+    errors = []
+    for spec in specs:
+        try:
+            render_dial(spec, os.path.join(target_dir, spec.filename), tick_table=tick_table)
+        except Exception as e:
+            errors.append((spec.filename, f"{type(e).__name__}: {e}"))
+    return errors
+
+
+def _format_value(value):
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+def _label(values):
+    return ', '.join(f"{key}={_format_value(value)}" for key, value in values.items())
+
+
+def draw_contact_sheet(variants, output, sheet='A4', columns=4, margin_mm=10.0, title=''):
+    """
+    Draw all variants scaled down into a grid, each captioned with its swept values.
+
+    Parameters:
+        variants (list): (index, values, DialSpec) as returned by sweep_variants.
+        output (str or file): Output PDF.
+        sheet (str or tuple): Name in SHEET_SIZES, or (width, height) in points.
+        columns (int): Dials per row.
+        margin_mm (float): Page margin.
+        title (str): Heading printed on every page.
+
+    Returns:
+        tuple: (number of pages, errors) with errors a list of (index, message) of the variants
+            that could not be drawn; they get a crossed-out placeholder on the sheet.
+    """
+    from reportlab.pdfgen import canvas
+
+    register_fonts()
+    page_width, page_height = SHEET_SIZES[sheet] if isinstance(sheet, str) else tuple(sheet)
+    margin = margin_mm * mm
+    line_height = CAPTION_SIZE * 1.25
+    caption_lines = 1 + max((len(values) for _, values, _ in variants), default=0)
+    header = 2 * line_height if title else 0.0
+
+    cell_width = (page_width - 2 * margin) / columns
+    cell_height = cell_width + caption_lines * line_height
+    rows = max(1, int((page_height - 2 * margin - header) // cell_height))
+    per_page = rows * columns
+    # Same scale for every dial, so the variants can be compared by eye
+    largest = max((spec.outer_radius_mm() for _, _, spec in variants), default=1.0) * mm
+    scale = (cell_width - 4 * mm) / (2 * largest)
+
+    c = canvas.Canvas(output, pagesize=(page_width, page_height))
+    tick_tables = {}
+    errors = []
+    pages = max(1, math.ceil(len(variants) / per_page))
+    for page in range(pages):
+        if title:
+            c.setFont(CAPTION_FONT, CAPTION_SIZE + 2)
+            c.drawString(margin, page_height - margin - line_height, f"{title}  (page {page + 1}/{pages})")
+        for slot, (index, values, spec) in enumerate(variants[page * per_page:(page + 1) * per_page]):
+            row, column = divmod(slot, columns)
+            left = margin + column * cell_width
+            top = page_height - margin - header - row * cell_height
+            radius = spec.outer_radius_mm() * mm
+
+            c.saveState()
+            c.translate(left + cell_width / 2, top - cell_width / 2)
+            c.scale(scale, scale)
+            c.setStrokeGray(0.8)
+            c.setLineWidth(0.5 / scale)
+            c.circle(0, 0, radius)
+            c.setStrokeGray(0)
+            try:
+                geometry = spec.geometry_key()
+                if geometry not in tick_tables:
+                    tick_tables[geometry] = _tick_table(spec)
+                draw_dial_face(c, spec, 0, 0, tick_table=tick_tables[geometry])
+            except Exception as e:
+                # One broken variant must not cost the whole sheet; cross out its cell instead
+                errors.append((index, f"{type(e).__name__}: {e}"))
+                c.restoreState()
+                c.saveState()
+                c.translate(left + cell_width / 2, top - cell_width / 2)
+                c.scale(scale, scale)
+                c.setStrokeGray(0.5)
+                c.setLineWidth(0.5 / scale)
+                offset = radius * 0.7071
+                c.line(-offset, -offset, offset, offset)
+                c.line(-offset, offset, offset, -offset)
+                c.setFont(CAPTION_FONT, CAPTION_SIZE / scale)
+                c.drawCentredString(0, -radius - CAPTION_SIZE / scale, "render failed")
+            c.restoreState()
+
+            c.setFont(CAPTION_FONT, CAPTION_SIZE)
+            captions = [spec.filename] + [f"{key} = {_format_value(value)}" for key, value in values.items()]
+            for line, caption in enumerate(captions):
+                c.drawCentredString(left + cell_width / 2, top - cell_width - (line + 0.8) * line_height, caption)
+        c.showPage()
+    c.save()
+    return pages, errors
+
+
+def run_sweep(base, axes, target_dir, workers=None, sheet='A4', columns=4, pdfs=True, title=''):
+    """
+    Render all variants of a sweep and their contact sheet.
+
+    Parameters:
+        base (DialSpec): Settings shared by all variants.
+        axes (list): (key, values) pairs as returned by parse_axis.
+        target_dir (str): Directory for the variant PDFs and contact_sheet.pdf.
+        workers (int or None): Number of worker processes (default: CPU count).
+        sheet (str or tuple): Contact sheet size, see draw_contact_sheet.
+        columns (int): Dials per contact sheet row.
+        pdfs (bool): Also write one PDF per variant; False only draws the contact sheet.
+        title (str): Contact sheet heading.
+
+    Returns:
+        dict: Summary with 'total', 'ok', 'failed', 'errors' [(index, label, message)] with label the
+            swept values of the variant, 'groups', 'contact_sheet', 'pages' and 'elapsed'.
+    """
+    start = time.perf_counter()
+    os.makedirs(target_dir, exist_ok=True)
+    variants, invalid = sweep_variants(base, axes)
+    errors = [(index, _label(values), message) for index, values, message in invalid]
+    workers = workers or os.cpu_count() or 1
+    jobs = group_by_geometry(variants, workers) if pdfs else []
+
+    contact_sheet = os.path.join(target_dir, 'contact_sheet.pdf')
+    index_of = {spec.filename: index for index, _, spec in variants}
+    labels = {index: _label(values) for index, values, _ in variants}
+    failed = {}  # index -> first error of a variant that failed to render or to draw
+    pages = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=register_fonts) as pool:
+        futures = [pool.submit(render_group, specs, target_dir) for specs in jobs]
+        # The contact sheet is drawn here while the workers write the variant PDFs
+        if variants:
+            pages, sheet_errors = draw_contact_sheet(variants, contact_sheet, sheet, columns, title=title)
+            failed.update(sheet_errors)
+        for future in futures:
+            for filename, error in future.result():
+                # A render error says more than the same failure on the contact sheet
+                failed[index_of[filename]] = error
+    errors.extend((index, labels[index], message) for index, message in failed.items())
+
+    return {
+        'total': len(variants) + len(invalid),
+        'ok': len(variants) - len(failed),
+        'failed': len(invalid) + len(failed),
+        'errors': sorted(errors),
+        'groups': len({spec.geometry_key() for _, _, spec in variants}),
+        'contact_sheet': contact_sheet if variants else None,
+        'pages': pages,
+        'elapsed': time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render every combination of some dial settings "
+                                                 "and compare them on a contact sheet.")
+    parser.add_argument('axes', nargs='+', metavar='KEY=VALUES',
+                        help="Setting and values to sweep: key=v1,v2,... or key=start:stop:step")
+    parser.add_argument('-c', '--config', default=config_file_path, help="Base dial configuration (config.ini)")
+    parser.add_argument('-o', '--output-dir', default=os.path.join(output_dir, 'sweep'),
+                        help="Directory for the variant PDFs and contact_sheet.pdf")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Number of worker processes")
+    parser.add_argument('--sheet', default='A4', choices=sorted(SHEET_SIZES), help="Contact sheet size")
+    parser.add_argument('--columns', type=int, default=4, help="Dials per contact sheet row")
+    parser.add_argument('--sheet-only', action='store_true', help="Only draw the contact sheet")
+    args = parser.parse_args(argv)
+
+    try:
+        base = read_config(args.config)
+        axes = [parse_axis(text) for text in args.axes]
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.columns <= 0:
+        print("--columns must be positive", file=sys.stderr)
+        return 2
+
+    title = "Sweep: " + "  ".join(text for text in args.axes)
+    summary = run_sweep(base, axes, args.output_dir, args.workers, args.sheet, args.columns,
+                        not args.sheet_only, title)
+
+    for index, label, message in summary['errors']:
+        print(f"FAILED variant {index} ({label}): {message}", file=sys.stderr)
+    print(f"Rendered {summary['ok']}/{summary['total']} variants ({summary['groups']} distinct tick geometries) "
+          f"in {summary['elapsed']:.2f}s, {summary['failed']} failed")
+    if summary['contact_sheet']:
+        print(f"Contact sheet: {summary['contact_sheet']} ({summary['pages']} pages)")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
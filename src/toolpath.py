@@ -0,0 +1,388 @@
+"""
+Engraving export: the dial as toolpaths for CNC engravers and lasers.
+
+The ticks come from the same TickTable as the PDF. Every tick becomes a polyline that
+zig-zags across the mark in as many passes as the tool needs for the configured line
+width, and consecutive ticks alternate direction so the tool only steps sideways from
+one tick to the next. Labels are engraved along the glyph outlines of the bundled
+DIN 1451 font, positioned exactly like the PDF labels.
+
+The order in which the tick chain and the glyph contours are cut is chosen with a
+nearest-neighbour tour improved by 2-opt, which cuts the rapid travel between them.
+
+Coordinates are in mm with the dial center at the origin. The output format follows
+the file extension: .dxf (R12, layers TICKS and LABELS) or .nc/.gcode/.ngc (G-code).
+
+Usage:
+    python -m src.toolpath -o dial.nc --tool 0.2 --feed 600
+    python -m src.toolpath -o dial.nc --laser 800
+    python -m src.toolpath -o dial.dxf
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+from .dialgenerator import (config_file_path, label_mask, read_config, resolve_major_tick_positions,
+                            ring_tick_tables)
+from .fonts import font_metrics
+from .geometry import MAJOR, MIDDLE_MINOR, compute_tick_table
+
+POINTS_TO_MM = 25.4 / 72
+
+
+class Path:
+    """
+    A polyline to be cut without lifting the tool.
+
+    Attributes:
+        points (ndarray): N x 2 array of coordinates in mm.
+        layer (str): 'TICKS' or 'LABELS'.
+        closed (bool): The last point connects back to the first.
+    """
+    __slots__ = ('points', 'layer', 'closed')
+
+    def __init__(self, points, layer, closed=False):
+        self.points = np.asarray(points, dtype=float)
+        self.layer = layer
+        self.closed = closed
+
+    def reversed(self):
+        return Path(self.points[::-1], self.layer, self.closed)
+
+    def length(self):
+        cut = np.hypot(*np.diff(self.points, axis=0).T).sum()
+        if self.closed:
+            cut += np.hypot(*(self.points[0] - self.points[-1]))
+        return cut
+
+
+def flatten_contour(contour, segments_per_curve=6):
+    """
+    Turn a TrueType contour (quadratic B-spline with implied on-curve points) into a polygon.
+
+    Returns:
+        list: (x, y) points of the closed polygon, without repeating the first point.
+    """
+    if not contour:
+        return []
+    points = list(contour)
+    # Start at an on-curve point; if there is none, start at an implied midpoint
+    start = next((i for i, p in enumerate(points) if p[2]), None)
+    if start is None:
+        (x0, y0, _), (x1, y1, _) = points[0], points[1]
+        points.insert(0, ((x0 + x1) / 2, (y0 + y1) / 2, True))
+        start = 0
+    points = points[start:] + points[:start]
+
+    result = [points[0][:2]]
+    current = points[0][:2]
+    control = None
+    for x, y, on_curve in points[1:] + [points[0]]:
+        if on_curve:
+            if control is None:
+                result.append((x, y))
+            else:
+                result.extend(_quadratic(current, control, (x, y), segments_per_curve))
+                control = None
+            current = (x, y)
+        else:
+            if control is not None:
+                # Two off-curve points in a row imply an on-curve point between them
+                mid = ((control[0] + x) / 2, (control[1] + y) / 2)
+                result.extend(_quadratic(current, control, mid, segments_per_curve))
+                current = mid
+            control = (x, y)
+    return result[:-1]
+
+
+def _quadratic(p0, p1, p2, segments):
+    t = np.linspace(0, 1, segments + 1)[1:]
+    x = (1 - t) ** 2 * p0[0] + 2 * (1 - t) * t * p1[0] + t ** 2 * p2[0]
+    y = (1 - t) ** 2 * p0[1] + 2 * (1 - t) * t * p1[1] + t ** 2 * p2[1]
+    return list(zip(x.tolist(), y.tolist()))
+
+
+def _mark(cos, sin, inner, outer, width_mm, tool_diameter):
+    """Zig-zag polyline covering one radial mark of the given width."""
+    passes = max(1, math.ceil(width_mm / tool_diameter - 1e-9))
+    spread = max(0.0, width_mm - tool_diameter)
+    offsets = np.linspace(-spread / 2, spread / 2, passes) if passes > 1 else np.zeros(1)
+    points = []
+    for i, offset in enumerate(offsets.tolist()):
+        # Offset perpendicular to the radial direction
+        ox, oy = -sin * offset, cos * offset
+        ends = [(ox + inner * cos, oy + inner * sin), (ox + outer * cos, oy + outer * sin)]
+        points.extend(ends if i % 2 == 0 else ends[::-1])
+    return points
+
+
+def tick_paths(spec, tick_table, tool_diameter):
+    """
+    Toolpaths of all ticks in angular order, alternating direction from tick to tick.
+
+    Parameters:
+        spec (DialSpec): The dial.
+        tick_table (TickTable): Its ticks.
+        tool_diameter (float): Engraved line width of one pass in mm.
+
+    Returns:
+        list: Path objects on layer 'TICKS'.
+    """
+    radius = spec.dial_radius_mm
+    half_major = spec.major_tick_length_mm / 2
+    paths = []
+    for index, (kind, cos, sin) in enumerate(zip(tick_table.kind.tolist(), tick_table.cos.tolist(),
+                                                 tick_table.sin.tolist())):
+        if kind == MAJOR:
+            marks = [_mark(cos, sin, radius - spec.major_tick_length_mm, radius - half_major,
+                           spec.major_tick_inner_width * POINTS_TO_MM, tool_diameter),
+                     _mark(cos, sin, radius - half_major, radius,
+                           spec.major_tick_width * POINTS_TO_MM, tool_diameter)]
+        else:
+            length = spec.middle_minor_tick_length_mm if kind == MIDDLE_MINOR else spec.minor_tick_length_mm
+            marks = [_mark(cos, sin, radius - length, radius, spec.minor_tick_width * POINTS_TO_MM, tool_diameter)]
+        if index % 2:
+            marks = [mark[::-1] for mark in reversed(marks)]
+        paths.extend(Path(mark, 'TICKS') for mark in marks)
+    return paths
+
+
+def label_paths(spec, tick_table, glyphs, segments_per_curve=6):
+    """
+    Glyph outline toolpaths of the major tick labels, placed like draw_labels places them.
+
+    Returns:
+        list: Closed Path objects on layer 'LABELS'.
+    """
+    size_mm = spec.font_size * POINTS_TO_MM
+    scale = size_mm / glyphs.units_per_em
+    mask = label_mask(tick_table, spec.label_step)
+    paths = []
+    for temp, cos, sin in zip(tick_table.temps[mask].tolist(), tick_table.cos[mask].tolist(),
+                              tick_table.sin[mask].tolist()):
+        text = str(int(temp))
+        x = spec.scale_text_radius_mm * cos - sum(glyphs.advance(ch) for ch in text) / 1000 * size_mm / 2
+        y = spec.scale_text_radius_mm * sin
+        if abs(sin) < 1e-6:
+            y -= size_mm * 0.3
+        for ch in text:
+            for contour in glyphs.contours(ch):
+                polygon = flatten_contour(contour, segments_per_curve)
+                if len(polygon) >= 2:
+                    paths.append(Path([(x + px * scale, y + py * scale) for px, py in polygon], 'LABELS', closed=True))
+            x += glyphs.advance(ch) / 1000 * size_mm
+    return paths
+
+
+def travel_distance(groups, home=(0.0, 0.0)):
+    """Total rapid travel between consecutive paths, starting at home."""
+    position = np.asarray(home, dtype=float)
+    total = 0.0
+    for group in groups:
+        for path in group:
+            total += np.hypot(*(path.points[0] - position))
+            position = path.points[0] if path.closed else path.points[-1]
+    return total
+
+
+def _group_ends(group):
+    last = group[-1]
+    return group[0].points[0], last.points[0] if last.closed else last.points[-1]
+
+
+def _reverse_group(group):
+    return [path.reversed() for path in reversed(group)]
+
+
+def order_groups(groups, home=(0.0, 0.0), max_moves=1000):
+    """
+    Order groups of paths to reduce rapid travel: nearest neighbour, then 2-opt.
+
+    A group is a list of paths that is always cut in sequence (e.g. the tick chain) but may be
+    cut back to front. Closed paths start and end at their first point.
+
+    Parameters:
+        groups (list): Lists of Path objects.
+        home (tuple): Tool position before the first cut.
+        max_moves (int): Upper bound on the number of 2-opt improvements applied.
+
+    Returns:
+        list: The groups in cutting order, some of them reversed.
+    """
+    if len(groups) <= 1:
+        return list(groups)
+    ends = [_group_ends(group) for group in groups]
+    starts = np.array([start for start, _ in ends])
+    stops = np.array([stop for _, stop in ends])
+
+    # Nearest neighbour: from the current position, go to the closest free group end
+    remaining = np.ones(len(groups), dtype=bool)
+    position = np.asarray(home, dtype=float)
+    order = []
+    for _ in range(len(groups)):
+        to_start = np.where(remaining, np.hypot(*(starts - position).T), np.inf)
+        to_stop = np.where(remaining, np.hypot(*(stops - position).T), np.inf)
+        best_start, best_stop = int(np.argmin(to_start)), int(np.argmin(to_stop))
+        if to_start[best_start] <= to_stop[best_stop]:
+            order.append((best_start, False))
+            position = stops[best_start]
+        else:
+            order.append((best_stop, True))
+            position = starts[best_stop]
+        remaining[order[-1][0]] = False
+
+    # 2-opt: reversing a run of groups i..j replaces the edges (i-1 -> i) and (j -> j+1)
+    for _ in range(max_moves):
+        entry = np.array([stops[g] if rev else starts[g] for g, rev in order])
+        exit_ = np.array([starts[g] if rev else stops[g] for g, rev in order])
+        previous = np.vstack([np.asarray(home, dtype=float), exit_[:-1]])
+        improved = False
+        for i in range(len(order) - 1):
+            j = np.arange(i + 1, len(order))
+            old = np.hypot(*(previous[i] - entry[i])) + np.append(np.hypot(*(exit_[j[:-1]] - entry[j[:-1] + 1]).T), 0.0)
+            new = np.hypot(*(previous[i] - exit_[j]).T) + np.append(np.hypot(*(entry[i] - entry[j[:-1] + 1]).T), 0.0)
+            gain = old - new
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                k = int(j[best])
+                order[i:k + 1] = [(g, not rev) for g, rev in reversed(order[i:k + 1])]
+                improved = True
+                break
+        if not improved:
+            break
+
+    return [_reverse_group(groups[g]) if rev else groups[g] for g, rev in order]
+
+
+def dial_toolpaths(spec, tool_diameter=0.2, glyphs=None, optimize=True):
+    """
+    All toolpaths of a dial in cutting order.
+
+    Parameters:
+        spec (DialSpec): The dial.
+        tool_diameter (float): Engraved line width of one pass in mm.
+        glyphs (FontMetrics or None): Font to engrave the labels with (default: the bundled font).
+        optimize (bool): Reorder the cuts to reduce rapid travel.
+
+    Returns:
+        list: Path objects.
+    """
+    if tool_diameter <= 0:
+        raise ValueError("Tool diameter must be positive")
+    tick_table = compute_tick_table(resolve_major_tick_positions(spec), spec.major_tick_division,
+                                    spec.minor_tick_division, spec.interpolation)
+    if glyphs is None:
+        glyphs = font_metrics()
+    groups = [tick_paths(spec, tick_table, tool_diameter)]
+    groups.extend([path] for path in label_paths(spec, tick_table, glyphs))
+    for ring, ring_table in ring_tick_tables(spec):
+        groups.append(tick_paths(ring, ring_table, tool_diameter))
+        groups.extend([path] for path in label_paths(ring, ring_table, glyphs))
+    if optimize:
+        groups = order_groups(groups)
+    return [path for group in groups for path in group]
+
+
+def write_dxf(paths, f):
+    """
+    Write paths as R12 DXF POLYLINE entities. Coordinates are in mm; R12 has no header variable
+    for drawing units, so the importing program has to be set to mm.
+    """
+    f.write("0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1009\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n")
+    for path in paths:
+        f.write(f"0\nPOLYLINE\n8\n{path.layer}\n66\n1\n70\n{1 if path.closed else 0}\n")
+        for x, y in path.points.tolist():
+            f.write(f"0\nVERTEX\n8\n{path.layer}\n10\n{x:.4f}\n20\n{y:.4f}\n")
+        f.write(f"0\nSEQEND\n8\n{path.layer}\n")
+    f.write("0\nENDSEC\n0\nEOF\n")
+
+
+def write_gcode(paths, f, feed=600.0, plunge_feed=200.0, safe_z=2.0, cut_z=-0.1, laser_power=None):
+    """
+    Write paths as G-code (mm, absolute coordinates).
+
+    Parameters:
+        paths (list): Path objects in cutting order.
+        f (file): Text file to write to.
+        feed (float): Cutting feed rate in mm/min.
+        plunge_feed (float): Z feed rate in mm/min (spindle mode).
+        safe_z, cut_z (float): Travel and engraving heights in mm (spindle mode).
+        laser_power (float or None): Laser mode: switch the beam with M3 S<power> / M5
+            instead of moving Z.
+    """
+    f.write("(Thermometer dial engraving)\nG21\nG90\n")
+    if laser_power is None:
+        f.write(f"G0 Z{safe_z:.3f}\n")
+    for path in paths:
+        points = path.points.tolist()
+        if path.closed:
+            points.append(points[0])
+        f.write(f"G0 X{points[0][0]:.4f} Y{points[0][1]:.4f}\n")
+        if laser_power is None:
+            f.write(f"G1 Z{cut_z:.3f} F{plunge_feed:g}\n")
+        else:
+            f.write(f"M3 S{laser_power:g}\n")
+        f.write(f"G1 X{points[1][0]:.4f} Y{points[1][1]:.4f} F{feed:g}\n")
+        for x, y in points[2:]:
+            f.write(f"G1 X{x:.4f} Y{y:.4f}\n")
+        f.write(f"G0 Z{safe_z:.3f}\n" if laser_power is None else "M5\n")
+    f.write("M2\n")
+
+
+def export_toolpaths(spec, output, tool_diameter=0.2, **gcode_options):
+    """
+    Write the toolpaths of a dial as DXF or G-code, depending on the output extension.
+
+    Returns:
+        dict: 'paths', 'cut_mm' and 'travel_mm' (rapid travel in the chosen order).
+    """
+    ext = os.path.splitext(output)[1].lower()
+    if ext == '.dxf':
+        writer = write_dxf
+    elif ext in ('.nc', '.gcode', '.ngc', '.tap'):
+        writer = write_gcode
+    else:
+        raise ValueError(f"Unsupported toolpath format '{ext}' (expected .dxf, .nc, .gcode or .ngc)")
+    paths = dial_toolpaths(spec, tool_diameter)
+    with open(output, 'w') as f:
+        if writer is write_dxf:
+            write_dxf(paths, f)
+        else:
+            write_gcode(paths, f, **gcode_options)
+    return {
+        'paths': len(paths),
+        'cut_mm': float(sum(path.length() for path in paths)),
+        'travel_mm': float(travel_distance([[path] for path in paths])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the dial as engraving toolpaths (DXF or G-code).")
+    parser.add_argument('-c', '--config', default=config_file_path, help="Dial configuration (config.ini)")
+    parser.add_argument('-o', '--output', required=True, help="Output file (.dxf, .nc, .gcode or .ngc)")
+    parser.add_argument('--tool', type=float, default=0.2, help="Engraved line width of one pass in mm")
+    parser.add_argument('--feed', type=float, default=600.0, help="Cutting feed rate in mm/min")
+    parser.add_argument('--plunge-feed', type=float, default=200.0, help="Plunge feed rate in mm/min")
+    parser.add_argument('--safe-z', type=float, default=2.0, help="Travel height in mm")
+    parser.add_argument('--cut-z', type=float, default=-0.1, help="Engraving depth in mm")
+    parser.add_argument('--laser', type=float, default=None, metavar='POWER',
+                        help="Laser mode: switch the beam with M3 S<POWER>/M5 instead of moving Z")
+    args = parser.parse_args(argv)
+
+    try:
+        spec = read_config(args.config)
+        summary = export_toolpaths(spec, args.output, args.tool, feed=args.feed, plunge_feed=args.plunge_feed,
+                                   safe_z=args.safe_z, cut_z=args.cut_z, laser_power=args.laser)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"Toolpaths saved as {args.output}: {summary['paths']} paths, "
+          f"{summary['cut_mm']:.0f} mm cutting, {summary['travel_mm']:.0f} mm rapid travel")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
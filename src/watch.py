@@ -0,0 +1,223 @@
+"""
+Watch mode: re-render dials whenever their configuration changes.
+
+config.ini (optionally also every .ini file in a spec directory, and the calibration
+CSV files they reference) is polled for changes. A burst of writes, as editors and
+scripts produce them, collapses into one update once the files have been quiet for the
+debounce delay. Every changed file is parsed and its DialSpec compared with the last
+one rendered from it, so saving without changes or editing only comments and
+whitespace does not render anything.
+
+Renders run one at a time on a persistent worker thread that registered the fonts when
+it started and keeps recent PDFs in a RenderCache, so flipping a setting back and forth
+is instant. A render overtaken by a newer edit of the same file is cancelled.
+
+Usage:
+    python -m src.dialgenerator --watch
+    python -m src.watch --spec-dir specs --debounce 0.5
+"""
+import argparse
+import configparser
+import glob
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import RenderCache, render_cached
+from .dialgenerator import RenderCancelled, read_config, register_fonts
+from .paths import config_file_path
+
+DEFAULT_DEBOUNCE = 0.3  # seconds without changes before rendering
+DEFAULT_INTERVAL = 0.1  # seconds between two polls
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DialWatcher:
+    """
+    Re-render the dials of a set of spec files when they change.
+
+    Parameters:
+        config_path (str or None): A single spec file, normally config.ini.
+        spec_dir (str or None): Directory whose .ini files are watched as well.
+        debounce (float): Seconds the files must stay unchanged before they are parsed.
+        interval (float): Seconds between two polls.
+        log (callable): Receives one status message per event.
+    """
+
+    def __init__(self, config_path=config_file_path, spec_dir=None, debounce=DEFAULT_DEBOUNCE,
+                 interval=DEFAULT_INTERVAL, log=print):
+        self.config_path = config_path
+        self.spec_dir = spec_dir
+        self.debounce = debounce
+        self.interval = interval
+        self.log = log
+        self.cache = RenderCache()
+        self.executor = ThreadPoolExecutor(max_workers=1, initializer=register_fonts)
+        self._signatures = {}  # watched file -> signature when the specs were last parsed
+        self._rendered = {}  # spec file -> DialSpec last sent to the worker, until its render fails
+        self._rendered_lock = threading.Lock()
+        self._calibrations = {}  # spec file -> calibration CSV it references
+        self._jobs = {}  # spec file -> (cancel event, future) of its latest render
+
+    def spec_paths(self):
+        """The spec files currently watched."""
+        paths = [self.config_path] if self.config_path else []
+        if self.spec_dir:
+            paths.extend(sorted(glob.glob(os.path.join(self.spec_dir, '*.ini'))))
+        # config.ini may live in the spec directory too
+        return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+    def poll(self):
+        """Signatures of every watched file."""
+        paths = set(self.spec_paths()) | set(self._calibrations.values())
+        return {path: file_signature(path) for path in paths}
+
+    def run(self, stop=None):
+        """
+        Render every spec once, then poll for changes until stop is set.
+
+        Parameters:
+            stop (threading.Event or None): Ends the loop when set; without one, run until interrupted.
+        """
+        stop = stop or threading.Event()
+        self.update(self.poll())
+        seen = self._signatures
+        changed_at = time.monotonic()
+        while not stop.wait(self.interval):
+            current = self.poll()
+            now = time.monotonic()
+            if current != seen:
+                # Still being written; wait until the files have been quiet for a while
+                seen, changed_at = current, now
+            elif current != self._signatures and now - changed_at >= self.debounce:
+                self.update(current)
+                seen = self._signatures
+
+    def update(self, signatures):
+        """
+        Parse the spec files affected by a change and render those whose spec differs.
+
+        Parameters:
+            signatures (dict): Result of poll().
+        """
+        previous = self._signatures
+        self._signatures = dict(signatures)
+        for path in self.spec_paths():
+            if signatures.get(path) is None:
+                with self._rendered_lock:
+                    removed = self._rendered.pop(path, None)
+                if removed is not None:
+                    self.log(f"{path}: removed")
+                self._calibrations.pop(path, None)
+                continue
+            calibration = self._calibrations.get(path)
+            if (previous.get(path) == signatures.get(path) and
+                    (calibration is None or previous.get(calibration) == signatures.get(calibration))):
+                continue
+            self._reload(path)
+
+    def _reload(self, path):
+        try:
+            spec = read_config(path)
+        except (OSError, ValueError, configparser.Error) as e:
+            # Typically a file caught half-written or a typo; the next save is parsed again
+            self.log(f"{path}: {e} (keeping the last dial)")
+            return
+
+        if spec.calibration_file:
+            self._calibrations[path] = spec.calibration_file
+            self._signatures[spec.calibration_file] = file_signature(spec.calibration_file)
+        else:
+            self._calibrations.pop(path, None)
+
+        with self._rendered_lock:
+            unchanged = spec == self._rendered.get(path)
+            if not unchanged:
+                self._rendered[path] = spec
+        if unchanged:
+            self.log(f"{path}: dial unchanged, not rendering")
+            return
+
+        job = self._jobs.get(path)
+        if job is not None and not job[1].done():
+            job[0].set()  # superseded by this edit
+        cancel = threading.Event()
+        future = self.executor.submit(self._render, path, spec, cancel)
+        self._jobs[path] = (cancel, future)
+
+    def _render(self, path, spec, cancel):
+        """Render one dial on the worker thread."""
+        def progress(phase, fraction):
+            if cancel.is_set():
+                raise RenderCancelled()
+
+        if cancel.is_set():
+            self._forget(path, spec)
+            return
+        start = time.perf_counter()
+        try:
+            hit = render_cached(self.cache, spec, progress=progress)
+        except RenderCancelled:
+            self._forget(path, spec)
+            return
+        except Exception as e:
+            # A broken dial must not end the watch; the next save gets another try
+            self._forget(path, spec)
+            self.log(f"{path}: render failed: {e}")
+            return
+        self.log(f"{path}: done in {time.perf_counter() - start:.2f}s" + (" (cached)" if hit else ""))
+
+    def _forget(self, path, spec):
+        """Let the next save render spec again after its render failed or was cancelled."""
+        with self._rendered_lock:
+            # A newer spec sent meanwhile stays recorded
+            if self._rendered.get(path) is spec:
+                del self._rendered[path]
+
+    def close(self):
+        """Cancel outstanding renders and stop the worker."""
+        for cancel, _ in self._jobs.values():
+            cancel.set()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-render dials whenever their configuration changes.")
+    parser.add_argument('-c', '--config', default=config_file_path, help="Spec file to watch (config.ini)")
+    parser.add_argument('--spec-dir', default=None, help="Also watch every .ini file in this directory")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help="Seconds without further writes before re-rendering")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="Seconds between two polls")
+    args = parser.parse_args(argv)
+
+    if args.spec_dir and not os.path.isdir(args.spec_dir):
+        print(f"Spec directory '{args.spec_dir}' not found.", file=sys.stderr)
+        return 2
+    if not args.spec_dir and not os.path.exists(args.config):
+        print(f"Configuration file '{args.config}' not found.", file=sys.stderr)
+        return 2
+
+    watcher = DialWatcher(args.config, args.spec_dir, args.debounce, args.interval)
+    watched = args.config + (f" and {os.path.join(args.spec_dir, '*.ini')}" if args.spec_dir else '')
+    print(f"Watching {watched} (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())